@@ -0,0 +1,201 @@
+"""
+Copy Coalescer
+Holds sized copies for a short window so bursts of trades become one net transaction per follower and asset
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def canonical_asset(asset: str) -> Tuple[str, int]:
+    """
+    Map an asset label to a netting key and a direction.
+    "SUI/USDC" and "USDC/SUI" share the key "SUI/USDC" with opposite signs;
+    single assets (transfers) always net positively.
+    """
+    if "/" not in asset:
+        return asset, 1
+    base, quote = asset.split("/", 1)
+    if base <= quote:
+        return f"{base}/{quote}", 1
+    return f"{quote}/{base}", -1
+
+
+class PendingCopy:
+    __slots__ = ("trader", "asset", "amount", "price", "trade", "queued_at")
+
+    def __init__(self, trader: str, asset: str, amount: int, price: float, trade: Any, queued_at: float):
+        self.trader = trader
+        self.asset = asset
+        self.amount = amount
+        self.price = price
+        self.trade = trade
+        self.queued_at = queued_at
+
+
+class CoalescedBatch:
+    """All pending copies for one follower and one netting key"""
+
+    def __init__(self, follower: str, key: str, opened_at: float, window: float):
+        self.follower = follower
+        self.key = key
+        self.opened_at = opened_at
+        self.window = window
+        self.entries: List[PendingCopy] = []
+        # Net position in units of the key's base asset (positive = key direction)
+        self.net_amount = 0.0
+
+    def add(self, entry: PendingCopy):
+        _, direction = canonical_asset(entry.asset)
+        if direction > 0:
+            self.net_amount += entry.amount
+        elif entry.price > 0:
+            # Reverse-direction amount is in the quote asset; price converts it to base
+            self.net_amount -= entry.amount * entry.price
+        else:
+            # Without a price the legs cannot be netted against each other
+            self.net_amount -= entry.amount
+        self.entries.append(entry)
+
+    @property
+    def asset(self) -> str:
+        """Asset label in the direction the net copy should be executed"""
+        if self.net_amount >= 0 or "/" not in self.key:
+            return self.key
+        base, quote = self.key.split("/", 1)
+        return f"{quote}/{base}"
+
+    @property
+    def copy_amount(self) -> int:
+        """Net amount to execute, in units of the outgoing asset of self.asset"""
+        if self.net_amount >= 0:
+            return int(self.net_amount)
+        reverse_prices = [
+            e.price for e in self.entries
+            if canonical_asset(e.asset)[1] < 0 and e.price > 0
+        ]
+        if not reverse_prices:
+            return int(-self.net_amount)
+        # Back from base units to the quote asset being sold
+        return int(-self.net_amount / reverse_prices[-1])
+
+    @property
+    def traders(self) -> List[str]:
+        return list(dict.fromkeys(entry.trader for entry in self.entries))
+
+    def due_at(self) -> float:
+        return self.opened_at + self.window
+
+
+class CopyCoalescer:
+    def __init__(
+        self,
+        default_window: float = 0.0,
+        max_latency: float = 30.0,
+        follower_windows: Optional[Dict[str, float]] = None,
+    ):
+        self.default_window = default_window
+        self.max_latency = max_latency
+        self.follower_windows = follower_windows or {}
+        self._batches: Dict[Tuple[str, str], CoalescedBatch] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, default_window: float = 0.0, max_latency: float = 30.0) -> "CopyCoalescer":
+        """
+        Load per-follower windows from a JSON file shaped like
+        {"defaultWindowSeconds": 0, "maxLatencySeconds": 30, "followers": {"0x...": 5}}
+        Falls back to the given defaults if the file is missing or invalid.
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return cls(
+                default_window=float(data.get("defaultWindowSeconds", default_window)),
+                max_latency=float(data.get("maxLatencySeconds", max_latency)),
+                follower_windows={k: float(v) for k, v in data.get("followers", {}).items()},
+            )
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not load coalescing settings from {os.path.basename(path)}: {e}")
+        return cls(default_window=default_window, max_latency=max_latency)
+
+    def window_for(self, follower: str) -> float:
+        window = self.follower_windows.get(follower, self.default_window)
+        return max(0.0, min(window, self.max_latency))
+
+    def add(
+        self,
+        follower: str,
+        trader: str,
+        asset: str,
+        amount: int,
+        trade: Any,
+        price: float = 0.0,
+        now: Optional[float] = None,
+        window: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue a sized copy; returns False if this follower does not coalesce.
+        An explicit window overrides the follower's (0 = due on the next flush).
+        """
+        if window is None:
+            window = self.window_for(follower)
+            if window <= 0:
+                return False
+
+        now = now if now is not None else time.monotonic()
+        key, _ = canonical_asset(asset)
+        with self._lock:
+            batch = self._batches.get((follower, key))
+            if batch is None:
+                batch = self._batches[(follower, key)] = CoalescedBatch(follower, key, now, window)
+            batch.add(PendingCopy(trader, asset, amount, price, trade, now))
+        return True
+
+    def requeue(self, batch: CoalescedBatch, now: Optional[float] = None):
+        """Put a batch that could not run yet back, due on the next flush"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            current = self._batches.get((batch.follower, batch.key))
+            if current is None:
+                batch.opened_at = now
+                batch.window = 0.0
+                self._batches[(batch.follower, batch.key)] = batch
+            else:
+                for entry in batch.entries:
+                    current.add(entry)
+
+    def due(self, now: Optional[float] = None) -> List[CoalescedBatch]:
+        """Remove and return every batch whose window has closed"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            ready = [key for key, batch in self._batches.items() if batch.due_at() <= now]
+            return [self._batches.pop(key) for key in ready]
+
+    def drain(self) -> List[CoalescedBatch]:
+        """Remove and return every pending batch, e.g. on shutdown"""
+        with self._lock:
+            batches = list(self._batches.values())
+            self._batches.clear()
+            return batches
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(batch.entries) for batch in self._batches.values())
+
+    def pending_amount(self, follower: str) -> int:
+        """
+        Sum of the follower's queued copy amounts before netting, i.e. the volume
+        they will add to the follower's rollups once executed
+        """
+        with self._lock:
+            return sum(
+                entry.amount
+                for batch in self._batches.values() if batch.follower == follower
+                for entry in batch.entries
+            )
@@ -0,0 +1,259 @@
+"""
+Community Event Indexer
+Incremental, cursor-persisted index of community package events: community
+metadata, community -> members, member -> communities and recent message metadata
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from rate_limiter import PRIORITY_BACKGROUND
+from rpc_router import RpcRouter
+
+# suix_queryEvents page size (the fullnode maximum)
+EVENT_PAGE_SIZE = 50
+
+
+class CommunityIndexer:
+    def __init__(
+        self,
+        router: RpcRouter,
+        package_id: str,
+        state_path: Optional[str] = None,
+        max_messages: int = 100,
+    ):
+        self.router = router
+        self.package_id = package_id
+        self.state_path = state_path
+        # Message metadata kept per community; older entries are only counted
+        self.max_messages = max_messages
+
+        self.communities: Dict[str, Dict] = {}
+        self.members: Dict[str, Set[str]] = {}
+        self.memberships: Dict[str, Set[str]] = {}
+        self.messages: Dict[str, Deque[Dict]] = {}
+        self.message_counts: Dict[str, int] = {}
+        self._cursor: Optional[Dict] = None
+        self._loaded_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        self._handlers = {
+            "CommunityCreated": self._on_community_created,
+            "DAOCommunityCreated": self._on_community_created,
+            "MemberJoined": self._on_member_joined,
+            "DAOMemberJoined": self._on_member_joined,
+            "MemberLeft": self._on_member_left,
+            "GroupMessageSent": self._on_message_sent,
+            "OwnershipTransferred": self._on_ownership_transferred,
+        }
+
+        if state_path:
+            self.load()
+
+    # ===== Sync =====
+
+    def sync(self, max_pages: Optional[int] = None) -> int:
+        """
+        Apply every community module event after the stored cursor, in chain
+        order (one MoveModule query keeps joins and leaves correctly ordered).
+        Returns how many events were applied; the state is saved if any were.
+        """
+        if not self.package_id:
+            return 0
+
+        with self._sync_lock:
+            applied = 0
+            pages = 0
+            while max_pages is None or pages < max_pages:
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "suix_queryEvents",
+                    "params": [
+                        {
+                            "MoveModule": {"package": self.package_id, "module": "community"}
+                        },
+                        self._cursor,
+                        EVENT_PAGE_SIZE,
+                        False  # ascending
+                    ]
+                }
+
+                try:
+                    result = self.router.call(payload, priority=PRIORITY_BACKGROUND)
+                except Exception as e:
+                    print(f"❌ Error syncing community events: {e}")
+                    break
+                if "result" not in result:
+                    print(f"⚠️ Community event sync rejected: {result.get('error')}")
+                    break
+
+                page = result["result"]
+                with self._lock:
+                    for event in page.get("data", []):
+                        handler = self._handlers.get(event.get("type", "").rsplit("::", 1)[-1])
+                        if handler:
+                            handler(event.get("parsedJson", {}))
+                            applied += 1
+                    if page.get("nextCursor"):
+                        self._cursor = page["nextCursor"]
+
+                pages += 1
+                if not page.get("hasNextPage"):
+                    break
+
+            if applied and self.state_path:
+                self.save()
+            return applied
+
+    # ===== Event handlers (called with the lock held) =====
+
+    def _on_community_created(self, event: Dict):
+        community_id = event.get("community_id")
+        if not community_id:
+            return
+        self.communities[community_id] = {
+            "id": community_id,
+            "owner": event.get("owner"),
+            "name": event.get("name", ""),
+            "isPaid": bool(event.get("is_paid", False)),
+            "entryFee": int(event.get("entry_fee", 0)),
+            "isDao": "token_type" in event,
+            "tokenType": event.get("token_type"),
+            "tokenThreshold": int(event.get("token_threshold", 0)),
+        }
+        self.members.setdefault(community_id, set())
+
+    def _on_member_joined(self, event: Dict):
+        community_id = event.get("community_id")
+        member = event.get("member")
+        if community_id and member:
+            self.members.setdefault(community_id, set()).add(member)
+            self.memberships.setdefault(member, set()).add(community_id)
+
+    def _on_member_left(self, event: Dict):
+        community_id = event.get("community_id")
+        member = event.get("member")
+        if community_id in self.members:
+            self.members[community_id].discard(member)
+        if member in self.memberships:
+            self.memberships[member].discard(community_id)
+            if not self.memberships[member]:
+                del self.memberships[member]
+
+    def _on_message_sent(self, event: Dict):
+        community_id = event.get("community_id")
+        if not community_id:
+            return
+        if community_id not in self.messages:
+            self.messages[community_id] = deque(maxlen=self.max_messages)
+        self.messages[community_id].append({
+            "messageId": event.get("message_id"),
+            "sender": event.get("sender"),
+            "timestamp": int(event.get("timestamp", 0)),
+        })
+        self.message_counts[community_id] = self.message_counts.get(community_id, 0) + 1
+
+    def _on_ownership_transferred(self, event: Dict):
+        community = self.communities.get(event.get("community_id"))
+        if community:
+            community["owner"] = event.get("new_owner")
+
+    # ===== Lookups (memory only) =====
+
+    def is_member(self, community_id: str, address: str) -> bool:
+        with self._lock:
+            return address in self.members.get(community_id, ())
+
+    def members_of(self, community_id: str) -> List[str]:
+        with self._lock:
+            return sorted(self.members.get(community_id, ()))
+
+    def communities_of(self, address: str) -> List[Dict]:
+        with self._lock:
+            return [
+                self.communities.get(community_id, {"id": community_id})
+                for community_id in sorted(self.memberships.get(address, ()))
+            ]
+
+    def community(self, community_id: str) -> Optional[Dict]:
+        with self._lock:
+            community = self.communities.get(community_id)
+            if community is None:
+                return None
+            return {
+                **community,
+                "memberCount": len(self.members.get(community_id, ())),
+                "messageCount": self.message_counts.get(community_id, 0),
+            }
+
+    def recent_messages(self, community_id: str, limit: int = 50) -> List[Dict]:
+        """Newest first"""
+        with self._lock:
+            recent = list(self.messages.get(community_id, ()))
+        return recent[::-1][:limit]
+
+    # ===== Persistence =====
+
+    def save(self):
+        """Write the cursor and indexes atomically, so a restart resumes where we stopped"""
+        with self._lock:
+            state = {
+                "cursor": self._cursor,
+                "communities": self.communities,
+                "members": {community_id: sorted(members) for community_id, members in self.members.items()},
+                "messages": {community_id: list(messages) for community_id, messages in self.messages.items()},
+                "messageCounts": self.message_counts,
+            }
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"⚠️ Could not save community index: {e}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-load the state file if it was replaced since the last load, for a
+        read-only copy of an index another process syncs and saves
+        """
+        try:
+            mtime = os.stat(self.state_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        self.load()
+        return True
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            # Taken before reading, so a save during the read triggers another reload
+            mtime = os.stat(self.state_path).st_mtime_ns
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load community index, rebuilding from chain: {e}")
+            return
+
+        with self._lock:
+            self._cursor = state.get("cursor")
+            self.communities = state.get("communities", {})
+            self.members = {community_id: set(members) for community_id, members in state.get("members", {}).items()}
+            self.memberships = {}
+            for community_id, members in self.members.items():
+                for member in members:
+                    self.memberships.setdefault(member, set()).add(community_id)
+            self.messages = {
+                community_id: deque(messages, maxlen=self.max_messages)
+                for community_id, messages in state.get("messages", {}).items()
+            }
+            self.message_counts = state.get("messageCounts", {})
+            self._loaded_mtime = mtime
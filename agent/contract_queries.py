@@ -3,17 +3,22 @@ Smart Contract Query Utilities
 Query the CopyTradingRegistry to get follower relationships
 """
 
-import requests
 from typing import Dict, List, Optional
 import os
 
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_DEFAULT, PRIORITY_TRADE
+from rpc_profiles import profile
+from rpc_router import RpcRouter
+from tracing import traced
+
 class ContractQuerier:
-    def __init__(self, rpc_url: str, registry_id: str, package_id: str):
+    def __init__(self, rpc_url: str, registry_id: str, package_id: str, router: Optional[RpcRouter] = None):
         self.rpc_url = rpc_url
         self.registry_id = registry_id
         self.package_id = package_id
+        self.router = router or RpcRouter([rpc_url])
     
-    def query_object(self, object_id: str) -> Optional[Dict]:
+    def query_object(self, object_id: str, priority: int = PRIORITY_DEFAULT) -> Optional[Dict]:
         """Query a Sui object by ID"""
         try:
             payload = {
@@ -22,16 +27,11 @@ class ContractQuerier:
                 "method": "sui_getObject",
                 "params": [
                     object_id,
-                    {
-                        "showContent": True,
-                        "showType": True,
-                        "showOwner": True
-                    }
+                    profile("object_content")
                 ]
             }
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=priority)
             
             if "result" in result and "data" in result["result"]:
                 return result["result"]["data"]
@@ -48,7 +48,7 @@ class ContractQuerier:
         """
         try:
             # Query the registry object
-            registry = self.query_object(self.registry_id)
+            registry = self.query_object(self.registry_id, priority=PRIORITY_BACKGROUND)
             
             if not registry:
                 print("⚠️ Could not fetch registry object")
@@ -97,8 +97,7 @@ class ContractQuerier:
                 ]
             }
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_BACKGROUND)
             
             if "result" in result and "data" in result["result"]:
                 for event in result["result"]["data"]:
@@ -115,8 +114,7 @@ class ContractQuerier:
             # Query unfollow events to remove relationships
             payload["params"][0]["MoveEventType"] = f"{self.package_id}::copy_trading::UnfollowTraderEvent"
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_BACKGROUND)
             
             if "result" in result and "data" in result["result"]:
                 for event in result["result"]["data"]:
@@ -141,10 +139,12 @@ class ContractQuerier:
             print(f"❌ Error querying events: {e}")
             return {}
     
+    @traced("get_follower_settings")
     def get_follower_settings(self, follower: str, trader: str) -> Optional[Dict]:
         """
         Get copy trading settings for a specific follower->trader relationship
-        Returns settings dict or None if not following
+        Returns settings dict or None if not following; raises if the RPC fails,
+        so a transient error is never mistaken for "not following"
         """
         try:
             # Query events to find the most recent settings
@@ -162,8 +162,9 @@ class ContractQuerier:
                 ]
             }
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
+            if "error" in result:
+                raise RuntimeError(f"suix_queryEvents failed: {result['error']}")
             
             if "result" in result and "data" in result["result"]:
                 for event in result["result"]["data"]:
@@ -178,8 +179,9 @@ class ContractQuerier:
             # Check for settings update events
             payload["params"][0]["MoveEventType"] = f"{self.package_id}::copy_trading::SettingsUpdatedEvent"
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
+            if "error" in result:
+                raise RuntimeError(f"suix_queryEvents failed: {result['error']}")
             
             if "result" in result and "data" in result["result"]:
                 for event in result["result"]["data"]:
@@ -195,7 +197,7 @@ class ContractQuerier:
             
         except Exception as e:
             print(f"❌ Error querying settings: {e}")
-            return None
+            raise
 
 
 # Test the querier
@@ -6,20 +6,35 @@ Monitors trader addresses and automatically copies their trades
 import asyncio
 import json
 import os
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
 # Fetch.ai imports
 from uagents import Agent, Context, Model
 from uagents.setup import fund_agent_if_low
 
-# Sui imports
-import requests
-
-# Import contract querier and executor
+# Import contract querier, executor and RPC router
 from contract_queries import ContractQuerier
+from coalescer import CoalescedBatch, CopyCoalescer
+from community_indexer import CommunityIndexer
+from copy_sizing import MIN_COPY_AMOUNT, STATUS_ERRORS, STATUS_EXPOSURE_LIMIT, size_copies
+from finality_tracker import FinalityResult, FinalityTracker
+from keystore_signer import DEFAULT_KEYSTORE_PATH, SigningService
+from preflight import PreflightRequest, PreflightSimulator
+from profiling import TickProfiler
+from history_api import start_history_api
+from history_store import HistoryStore
+from rollups import RollupEngine
+from rate_limiter import PRIORITY_TRADE, TokenBucketLimiter
+from rpc_profiles import TxSummary, decode_tx_summaries, profile
+from rpc_router import RpcRouter
 from sui_executor import SuiTransactionExecutor
+from trade_dedup import DetectionWatermarks
+from tx_templates import TemplateCache
+from username_resolver import UsernameResolver
+import tracing
 
 # Load environment variables
 load_dotenv()
@@ -27,9 +42,61 @@ load_dotenv()
 # Configuration
 FETCHAI_API_KEY = os.getenv("FETCHAI_API_KEY", "")
 SUI_RPC_URL = os.getenv("SUI_RPC_URL", "https://rpc-testnet.suiscan.xyz:443")
+# Optional comma-separated list of fullnodes; reads go to the fastest healthy one
+SUI_RPC_URLS = os.getenv("SUI_RPC_URLS", SUI_RPC_URL)
 COPY_TRADING_PACKAGE_ID = os.getenv("COPY_TRADING_PACKAGE_ID", "")
 COPY_TRADING_REGISTRY_ID = os.getenv("COPY_TRADING_REGISTRY_ID", "")
+USERNAME_REGISTRY_PACKAGE_ID = os.getenv(
+    "USERNAME_REGISTRY_PACKAGE_ID",
+    "0xf280398432bee996bb8ddf1fc62a6c1dfa43204884c4270a1eb2ac4687513f0f"
+)
+USERNAME_SYNC_INTERVAL = float(os.getenv("USERNAME_SYNC_INTERVAL", "60"))  # seconds
+# Community/DAO membership index, caught up at startup and kept current from events
+COMMUNITY_PACKAGE_ID = os.getenv(
+    "COMMUNITY_PACKAGE_ID",
+    "0x525a9ee83a400d5a95c79ad0bc9f09a7bc6a0d15eecac2caa999c693b8db50a2"
+)
+COMMUNITY_INDEX_PATH = os.getenv("COMMUNITY_INDEX_PATH", os.path.join(os.path.dirname(__file__), "community_index.json"))
+COMMUNITY_SYNC_INTERVAL = float(os.getenv("COMMUNITY_SYNC_INTERVAL", "30"))  # seconds
 POLLING_INTERVAL = int(os.getenv("POLLING_INTERVAL", "10"))  # seconds
+# Transactions fetched per page when scanning a trader, and how many pages a scan
+# may walk back to reach the trader's watermark (e.g. after downtime)
+DETECTION_PAGE_SIZE = int(os.getenv("DETECTION_PAGE_SIZE", "5"))
+DETECTION_MAX_PAGES = int(os.getenv("DETECTION_MAX_PAGES", "10"))
+# Shared RPC quota (requests per second / burst size) across the whole agent
+SUI_RPC_RATE_LIMIT = float(os.getenv("SUI_RPC_RATE_LIMIT", "20"))
+SUI_RPC_BURST = float(os.getenv("SUI_RPC_BURST", "40"))
+# Indexed copy history and the local read API the UI queries (port 0 disables the API)
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(os.path.dirname(__file__), "copy_history.db"))
+HISTORY_API_PORT = int(os.getenv("HISTORY_API_PORT", "3003"))
+# Max MIST a follower may copy per rolling 24h (0 = no limit)
+FOLLOWER_EXPOSURE_LIMIT = int(os.getenv("FOLLOWER_EXPOSURE_LIMIT", "0"))
+# Coalescing window for bursts of trades (0 = copy immediately); per-follower
+# overrides live in coalescing.json
+COPY_COALESCE_WINDOW = float(os.getenv("COPY_COALESCE_WINDOW", "0"))
+COPY_COALESCE_MAX_LATENCY = float(os.getenv("COPY_COALESCE_MAX_LATENCY", "30"))
+# How often submitted copies are confirmed on chain, and how long before we give up
+FINALITY_POLL_INTERVAL = float(os.getenv("FINALITY_POLL_INTERVAL", "2"))
+FINALITY_TIMEOUT = float(os.getenv("FINALITY_TIMEOUT", "120"))
+# Dry-run copies before submitting them and size gas from the simulation
+PREFLIGHT_ENABLED = os.getenv("PREFLIGHT_ENABLED", "true").lower() == "true"
+PREFLIGHT_CONCURRENCY = int(os.getenv("PREFLIGHT_CONCURRENCY", "8"))
+DEFAULT_GAS_BUDGET = 10000000
+# Local keystore with delegated/custodial follower keys; signing runs in a process pool
+SUI_KEYSTORE_PATH = os.getenv("SUI_KEYSTORE_PATH", DEFAULT_KEYSTORE_PATH)
+SIGNER_POOL = os.getenv("SIGNER_POOL", "process")  # "process" or "thread"
+# Per-follower transaction templates and cached copy settings are refreshed in the
+# background and never used once older than this many seconds
+TEMPLATE_MAX_AGE = float(os.getenv("TEMPLATE_MAX_AGE", "30"))
+# Per-stage trade spans as OTLP/JSON lines and/or to an OTLP/HTTP collector
+# (e.g. http://localhost:4318/v1/traces); both empty = tracing off
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+# cProfile the next N runs of a handler, e.g. "monitor_trades:5,startup"; a
+# ProfileRequest message from one of PROFILE_CONTROL_SENDERS arms it at runtime
+PROFILE_TICKS = os.getenv("PROFILE_TICKS", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "profiles"))
+PROFILE_CONTROL_SENDERS = {s.strip() for s in os.getenv("PROFILE_CONTROL_SENDERS", "").split(",") if s.strip()}
 
 # Agent setup
 agent = Agent(
@@ -45,14 +112,53 @@ fund_agent_if_low(agent.wallet.address())
 print(f"🤖 Copy Trading Agent Address: {agent.address}")
 print(f"💼 Agent Wallet: {agent.wallet.address()}")
 
-# Initialize contract querier and transaction executor
+tracing.configure(path=TRACE_FILE or None, endpoint=TRACE_OTLP_ENDPOINT or None)
+profiler = TickProfiler.from_env_value(PROFILE_TICKS, PROFILE_DIR)
+
+# Initialize the shared RPC router, contract querier and transaction executor
+rpc_limiter = TokenBucketLimiter(rate=SUI_RPC_RATE_LIMIT, burst=SUI_RPC_BURST)
+rpc_router = RpcRouter.from_env_value(SUI_RPC_URLS, limiter=rpc_limiter)
+
 contract_querier = ContractQuerier(
     rpc_url=SUI_RPC_URL,
     registry_id=COPY_TRADING_REGISTRY_ID,
-    package_id=COPY_TRADING_PACKAGE_ID
+    package_id=COPY_TRADING_PACKAGE_ID,
+    router=rpc_router
+)
+
+usernames = UsernameResolver(rpc_router, USERNAME_REGISTRY_PACKAGE_ID)
+community_index = CommunityIndexer(rpc_router, COMMUNITY_PACKAGE_ID, state_path=COMMUNITY_INDEX_PATH)
+
+signing_service = None
+if os.path.exists(SUI_KEYSTORE_PATH):
+    try:
+        signing_service = SigningService(SUI_KEYSTORE_PATH, use_processes=SIGNER_POOL == "process")
+        print(f"🔑 Loaded {len(signing_service.addresses)} signing key(s) from {SUI_KEYSTORE_PATH}")
+    except Exception as e:
+        print(f"⚠️ Could not load keystore {SUI_KEYSTORE_PATH}: {e}")
+
+tx_executor = SuiTransactionExecutor(rpc_url=SUI_RPC_URL, router=rpc_router, signer=signing_service)
+
+template_cache = TemplateCache(
+    tx_executor,
+    contract_querier,
+    max_age=TEMPLATE_MAX_AGE,
+    default_gas_budget=DEFAULT_GAS_BUDGET
 )
 
-tx_executor = SuiTransactionExecutor(rpc_url=SUI_RPC_URL)
+history_store = HistoryStore(HISTORY_DB_PATH)
+rollup_engine = RollupEngine(HISTORY_DB_PATH)
+detection_watermarks = DetectionWatermarks(HISTORY_DB_PATH)
+
+finality_tracker = FinalityTracker(rpc_router, timeout=FINALITY_TIMEOUT)
+
+preflight_simulator = PreflightSimulator(tx_executor, max_concurrency=PREFLIGHT_CONCURRENCY)
+
+copy_coalescer = CopyCoalescer.from_file(
+    os.path.join(os.path.dirname(__file__), "coalescing.json"),
+    default_window=COPY_COALESCE_WINDOW,
+    max_latency=COPY_COALESCE_MAX_LATENCY
+)
 
 
 # Data Models
@@ -77,12 +183,19 @@ class TradeCopied(Model):
     error: Optional[str] = None
 
 
+class ProfileRequest(Model):
+    """Control message: cProfile the next `ticks` runs of a handler"""
+    task: str = "monitor_trades"
+    ticks: int = 1
+
+
 # In-memory storage
 class AgentState:
     def __init__(self):
         self.monitored_traders: Dict[str, List[str]] = {}  # trader -> [followers]
-        self.last_processed_tx: Dict[str, str] = {}  # trader -> last_tx_digest
         self.trade_history: List[Dict] = []
+        # Followers with a copy transaction being built or submitted right now
+        self.senders_in_flight: Set[str] = set()
         
     def add_follower(self, trader: str, follower: str):
         if trader not in self.monitored_traders:
@@ -92,14 +205,36 @@ class AgentState:
     
     def get_followers(self, trader: str) -> List[str]:
         return self.monitored_traders.get(trader, [])
+    
+    def claim_sender(self, follower: str) -> bool:
+        """
+        Reserve a follower for one copy transaction at a time. A second one built
+        while the first is in flight would pick the same gas coin version, and two
+        signed transactions spending one owned object version can lock the coin
+        until the epoch ends.
+        """
+        if follower in self.senders_in_flight:
+            return False
+        self.senders_in_flight.add(follower)
+        return True
+    
+    def release_senders(self, followers: List[str]):
+        self.senders_in_flight.difference_update(followers)
 
 
 state = AgentState()
 
 
 # Sui Blockchain Functions
-async def query_sui_transactions(address: str, limit: int = 10) -> List[Dict]:
-    """Query transactions for a specific address using Sui RPC"""
+async def query_sui_transactions(
+    address: str,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[TxSummary], Optional[str]]:
+    """
+    Query one page of transactions for a specific address using Sui RPC (trade_scan
+    profile only), newest first. Returns the page and the cursor of the next one.
+    """
     try:
         payload = {
             "jsonrpc": "2.0",
@@ -108,40 +243,57 @@ async def query_sui_transactions(address: str, limit: int = 10) -> List[Dict]:
             "params": [
                 {
                     "filter": {"FromAddress": address},
-                    "options": {
-                        "showInput": True,
-                        "showEffects": True,
-                        "showEvents": True,
-                        "showBalanceChanges": True,
-                    }
+                    "options": profile("trade_scan")
                 },
-                None,  # cursor
+                cursor,
                 limit,
                 True  # descending order
             ]
         }
         
-        response = requests.post(SUI_RPC_URL, json=payload, timeout=10)
-        result = response.json()
+        # Off the event loop: the call can wait on the rate limiter and 429 back-offs
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, tracing.bind(rpc_router.call), payload, None, PRIORITY_TRADE
+        )
         
         if "result" in result and "data" in result["result"]:
-            return result["result"]["data"]
-        return []
+            page = result["result"]
+            next_cursor = page.get("nextCursor") if page.get("hasNextPage") else None
+            # FromAddress filter means every block was sent by this address
+            return decode_tx_summaries(page["data"], sender=address), next_cursor
+        return [], None
     except Exception as e:
         print(f"❌ Error querying Sui: {e}")
-        return []
+        return [], None
+
+
+async def query_unseen_transactions(trader: str) -> List[TxSummary]:
+    """
+    Page back through a trader's transactions until the pages reach what the
+    trader's watermark already covers (or DETECTION_MAX_PAGES is hit), so a burst
+    larger than one page is never silently skipped
+    """
+    transactions: List[TxSummary] = []
+    cursor = None
+    for _ in range(DETECTION_MAX_PAGES):
+        page, cursor = await query_sui_transactions(trader, limit=DETECTION_PAGE_SIZE, cursor=cursor)
+        transactions.extend(page)
+        if not cursor or detection_watermarks.covers(trader, page):
+            return transactions
+    print(f"⚠️ {trader[:16]}... has more than {DETECTION_MAX_PAGES} pages of unseen transactions; older ones are skipped")
+    return transactions
 
 
-async def analyze_trade(tx: Dict) -> Optional[TradeDetected]:
+async def analyze_trade(tx: TxSummary) -> Optional[TradeDetected]:
     """Analyze a transaction and extract trade information"""
     try:
         # Extract basic info
-        digest = tx.get("digest", "")
-        timestamp = tx.get("timestampMs", 0)
-        sender = tx.get("transaction", {}).get("data", {}).get("sender", "")
+        digest = tx.digest
+        timestamp = tx.timestamp_ms
+        sender = tx.sender
         
         # Analyze balance changes to determine trade type
-        balance_changes = tx.get("balanceChanges", [])
+        balance_changes = tx.balance_changes
         
         if not balance_changes:
             return None
@@ -153,8 +305,8 @@ async def analyze_trade(tx: Dict) -> Optional[TradeDetected]:
             incoming = None
             
             for change in balance_changes:
-                amount = int(change.get("amount", 0))
-                coin_type = change.get("coinType", "").split("::")[-1]
+                amount = change.amount
+                coin_type = change.coin_symbol
                 
                 if amount < 0 and not outgoing:
                     outgoing = {"coin": coin_type, "amount": abs(amount)}
@@ -175,8 +327,8 @@ async def analyze_trade(tx: Dict) -> Optional[TradeDetected]:
         # Single balance change = transfer
         elif len(balance_changes) == 1:
             change = balance_changes[0]
-            amount = abs(int(change.get("amount", 0)))
-            coin_type = change.get("coinType", "").split("::")[-1]
+            amount = abs(change.amount)
+            coin_type = change.coin_symbol
             
             return TradeDetected(
                 trader=sender,
@@ -194,126 +346,308 @@ async def analyze_trade(tx: Dict) -> Optional[TradeDetected]:
         return None
 
 
-async def execute_copy_trade(follower: str, trade: TradeDetected) -> TradeCopied:
-    """Execute a copy trade for a follower"""
+async def preflight_copies(
+    requests: List[PreflightRequest],
+    spans: Optional[List[Optional[tracing.Span]]] = None
+) -> List[Tuple[PreflightRequest, int, Optional[str]]]:
+    """
+    Dry-run a batch of copies on a worker thread; returns (request, gas_budget, error)
+    per request. With pre-flight disabled every copy passes with the default budget.
+    spans are the copies' own spans, so each dry run is attributed to its copy.
+    """
+    if not PREFLIGHT_ENABLED or not requests:
+        return [(request, DEFAULT_GAS_BUDGET, None) for request in requests]
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(None, tracing.bind(preflight_simulator.simulate_many), requests, spans)
+    return [
+        (result.request, result.gas_budget, None if result.ok else result.error)
+        for result in results
+    ]
+
+
+async def submit_transfers(
+    transfers: List[Tuple[str, str, int, int]],
+    spans: Optional[List[Optional[tracing.Span]]] = None
+) -> List[Optional[str]]:
+    """
+    Execute (from, to, amount, gas_budget) transfers on a worker thread so building,
+    batch signing and submission never block the event loop
+    """
+    if not transfers:
+        return []
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, tracing.bind(tx_executor.execute_sui_transfers), transfers, spans)
+    except Exception as e:
+        print(f"❌ Error executing transfers: {e}")
+        return [None] * len(transfers)
+
+
+async def submit_prepared(
+    prepared: List[Tuple[str, bytes]],
+    spans: Optional[List[Optional[tracing.Span]]] = None
+) -> List[Optional[str]]:
+    """
+    Sign and submit transactions filled from templates, off the event loop. A copy
+    that did not make it on chain leaves its template stale so it gets refetched.
+    """
+    if not prepared:
+        return []
+    loop = asyncio.get_running_loop()
+    try:
+        digests = await loop.run_in_executor(None, tracing.bind(tx_executor.submit_prepared), prepared, spans)
+    except Exception as e:
+        print(f"❌ Error submitting templated transfers: {e}")
+        digests = [None] * len(prepared)
+    for (follower, _), digest in zip(prepared, digests):
+        if not digest:
+            template_cache.mark_stale(follower)
+    return digests
+
+
+async def fetch_balances(
+    followers: List[Optional[str]],
+    spans: Optional[Dict[str, Optional[tracing.Span]]] = None
+) -> List[int]:
+    """
+    Balance per follower (0 for None), from the follower's template when it has
+    one, otherwise fetched concurrently on executor threads (each under the
+    follower's span in spans, if given)
+    """
+    spans = spans or {}
+    balances = [0] * len(followers)
+    lookups = []
+    for index, follower in enumerate(followers):
+        if follower is None:
+            continue
+        template = template_cache.get(follower)
+        if template:
+            balances[index] = template.balance
+        else:
+            lookups.append(index)
+    
+    loop = asyncio.get_running_loop()
+    fetched = await asyncio.gather(*(
+        loop.run_in_executor(None, tracing.bind(tx_executor.get_balance, spans.get(followers[index])), followers[index])
+        for index in lookups
+    ))
+    for index, balance in zip(lookups, fetched):
+        balances[index] = balance
+    return balances
+
+
+async def fetch_settings(
+    pairs: List[Tuple[str, str]],
+    spans: Optional[Dict[str, Optional[tracing.Span]]] = None
+) -> List:
+    """
+    Copy settings per (follower, trader) pair, or the exception its lookup raised.
+    Cached settings come straight back; misses are fetched concurrently on
+    executor threads (each under the follower's span in spans, if given).
+    """
+    spans = spans or {}
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(None, tracing.bind(template_cache.settings_for, spans.get(follower)), follower, trader)
+        for follower, trader in pairs
+    ), return_exceptions=True)
+
+
+async def execute_copy_trades(
+    followers: List[str],
+    trade: TradeDetected,
+    coalesce: bool = True
+) -> List[TradeCopied]:
+    """
+    Size a trade for all of its followers in one vectorized pass, then execute the approved copies.
+    Approved copies for followers with a coalescing window are queued instead and
+    left out of the returned results; flush_coalesced_copies executes them later.
+    Followers with a ready transaction template skip pre-flight and go straight to
+    signing, so their only RPC on this path is the submission. A follower that
+    already has a copy in flight is deferred to the next coalescer flush.
+    """
+    print(f"📋 Copying trade for {len(followers)} follower(s)...")
+    print(f"   Trader: {trade.trader[:8]}...")
+    print(f"   Action: {trade.action}")
+    print(f"   Asset: {trade.asset}")
+    print(f"   Amount: {trade.amount}")
+    
+    def failed(follower: str, error: str, amount: str = "0") -> TradeCopied:
+        return TradeCopied(
+            follower=follower,
+            trader=trade.trader,
+            amount=amount,
+            success=False,
+            error=error
+        )
+    
+    # Ensure amount is an integer
     try:
-        print(f"📋 Copying trade for {follower[:8]}...")
-        print(f"   Trader: {trade.trader[:8]}...")
-        print(f"   Action: {trade.action}")
-        print(f"   Asset: {trade.asset}")
-        print(f"   Amount: {trade.amount}")
+        original_amount = int(trade.amount) if isinstance(trade.amount, str) else trade.amount
+    except (ValueError, TypeError):
+        print(f"   ⚠️ Could not parse amount: {trade.amount}")
+        return [failed(follower, "Invalid amount") for follower in followers]
+    
+    results: Dict[str, TradeCopied] = {}
+    # One span per follower copy, from its settings lookup until its submission returns
+    copy_spans = {follower: tracing.start_span("copy", follower=follower) for follower in followers}
+    
+    # 1. Each follower's copy settings (kept fresh in the background by the template cache)
+    candidates = []
+    all_settings = await fetch_settings([(follower, trade.trader) for follower in followers], copy_spans)
+    for follower, settings in zip(followers, all_settings):
+        if isinstance(settings, Exception):
+            results[follower] = failed(follower, str(settings))
+            continue
+        if not settings:
+            print(f"   ⚠️  No settings found for {follower[:8]}...->trader relationship")
+            results[follower] = failed(follower, "No settings found")
+            continue
+        candidates.append((follower, settings))
+    
+    if candidates:
+        enabled = [bool(settings.get('auto_copy_enabled', True)) for _, settings in candidates]
         
-        # 1. Query the follower's copy settings from the smart contract
-        settings = contract_querier.get_follower_settings(follower, trade.trader)
+        # 2. Balances and recent exposure (only needed for enabled followers)
+        balances = await fetch_balances([
+            follower if is_enabled else None
+            for (follower, _), is_enabled in zip(candidates, enabled)
+        ], copy_spans)
+        exposure_used = None
+        exposure_limit = None
+        if FOLLOWER_EXPOSURE_LIMIT:
+            # Copies still waiting in the coalescer count too, or a burst could queue past the limit
+            exposure_used = []
+            for follower, _ in candidates:
+                rollup = rollup_engine.get("follower", follower)
+                used = rollup["24h"]["volume"] if rollup else 0
+                exposure_used.append(used + copy_coalescer.pending_amount(follower))
+            exposure_limit = [FOLLOWER_EXPOSURE_LIMIT] * len(candidates)
         
-        if not settings:
-            print(f"   ⚠️  No settings found for this follower->trader relationship")
-            return TradeCopied(
-                follower=follower,
-                trader=trade.trader,
-                amount="0",
-                success=False,
-                error="No settings found"
-            )
+        # 3. Percentage, caps, exposure, dust floor and gas reserve for everyone at once
+        sizing = size_copies(
+            original_amount,
+            copy_percentage=[int(settings.get('copy_percentage', 10)) for _, settings in candidates],
+            max_trade_size=[int(settings.get('max_trade_size', 100000000)) for _, settings in candidates],
+            balance=balances,
+            auto_copy_enabled=enabled,
+            exposure_used=exposure_used,
+            exposure_limit=exposure_limit,
+        )
         
-        if not settings.get('auto_copy_enabled', True):
-            print(f"   ⏸️  Auto-copy disabled for this follower")
-            return TradeCopied(
-                follower=follower,
+        # 4. Queue coalescing followers; everyone else is copied now
+        to_execute = []
+        prepared = []  # (follower, copy_amount, tx_bytes) filled from a template
+        claimed = []
+        for index, (follower, settings) in enumerate(candidates):
+            copy_amount = int(sizing.copy_amounts[index])
+            error = sizing.error_for(index)
+            
+            if error:
+                print(f"   ⏸️  {follower[:8]}...: {error} ({copy_amount} MIST)")
+                results[follower] = failed(follower, error, str(copy_amount))
+                continue
+            
+            if coalesce and copy_coalescer.add(
+                follower,
                 trader=trade.trader,
-                amount="0",
-                success=False,
-                error="Auto-copy disabled"
-            )
+                asset=trade.asset,
+                amount=copy_amount,
+                trade=trade,
+                price=float(trade.price or 0)
+            ):
+                print(f"   🧺 Queued {copy_amount} MIST for {follower[:8]}... (coalescing)")
+                continue
+            
+            if not state.claim_sender(follower):
+                copy_coalescer.add(
+                    follower,
+                    trader=trade.trader,
+                    asset=trade.asset,
+                    amount=copy_amount,
+                    trade=trade,
+                    price=float(trade.price or 0),
+                    window=0
+                )
+                print(f"   ⏳ Deferred {copy_amount} MIST for {follower[:8]}... (copy already in flight)")
+                continue
+            claimed.append(follower)
+            
+            # Simplified: send to trader
+            tx_bytes = template_cache.fill(follower, trade.trader, copy_amount)
+            if tx_bytes:
+                prepared.append((follower, copy_amount, tx_bytes))
+            else:
+                to_execute.append(PreflightRequest(follower, trade.trader, copy_amount))
         
-        # 2. Calculate the appropriate copy amount based on settings
-        # Ensure amount is an integer
         try:
-            original_amount = int(trade.amount) if isinstance(trade.amount, str) else trade.amount
-        except (ValueError, TypeError):
-            print(f"   ⚠️ Could not parse amount: {trade.amount}")
-            return TradeCopied(
-                follower=follower,
-                trader=trade.trader,
-                amount="0",
-                success=False,
-                error="Invalid amount"
-            )
-        
-        copy_percentage = int(settings.get('copy_percentage', 10))
-        max_trade_size = int(settings.get('max_trade_size', 100000000))
-        
-        copy_amount = (original_amount * copy_percentage) // 100
-        copy_amount = min(copy_amount, max_trade_size)
-        
-        print(f"   💰 Copy amount: {copy_amount} MIST ({copy_amount/1_000_000_000:.6f} SUI)")
-        print(f"   📊 Settings: {copy_percentage}% of trade, max {max_trade_size/1_000_000_000:.2f} SUI")
-        
-        # 3. Execute the actual trade on testnet!
-        print(f"\n🚀 EXECUTING REAL TRANSACTION ON TESTNET...")
-        
-        # Get the recipient from the original trade
-        # For transfers, copy to the same recipient
-        # For now, we'll demonstrate with the concept
-        
-        # Check follower's balance first
-        balance = tx_executor.get_balance(follower)
-        print(f"   Follower balance: {balance/1_000_000_000:.6f} SUI")
-        
-        if balance < (copy_amount + 10000000):  # Amount + gas
-            print(f"   ⚠️ Insufficient balance! Need {(copy_amount + 10000000)/1_000_000_000:.6f} SUI")
-            return TradeCopied(
-                follower=follower,
-                trader=trade.trader,
-                amount=str(copy_amount),
-                success=False,
-                error="Insufficient balance"
+            # 5. Simulate the whole batch and drop copies that would fail
+            transfers = []
+            checked = await preflight_copies(to_execute, [copy_spans[request.follower] for request in to_execute])
+            for request, gas_budget, error in checked:
+                if error:
+                    print(f"   🧪 Pre-flight rejected {request.follower[:8]}...: {error}")
+                    results[request.follower] = failed(request.follower, error, str(request.amount))
+                    continue
+                
+                print(f"\n🚀 EXECUTING REAL TRANSACTION ON TESTNET...")
+                print(f"   Follower: {request.follower[:8]}...")
+                print(f"   💰 Copy amount: {request.amount} MIST ({request.amount/1_000_000_000:.6f} SUI)")
+                transfers.append((request.follower, request.recipient, request.amount, gas_budget))
+            
+            # 6. Build, sign (one batch each, off the event loop) and submit; both
+            # paths run at once since every claimed sender is in exactly one of them
+            prepared_digests, transfer_digests = await asyncio.gather(
+                submit_prepared(
+                    [(follower, tx_bytes) for follower, _, tx_bytes in prepared],
+                    [copy_spans[follower] for follower, _, _ in prepared]
+                ),
+                submit_transfers(transfers, [copy_spans[follower] for follower, _, _, _ in transfers])
             )
+            submitted = [(follower, copy_amount) for follower, copy_amount, _ in prepared]
+            submitted += [(follower, copy_amount) for follower, _, copy_amount, _ in transfers]
+            for (follower, copy_amount), tx_digest in zip(submitted, prepared_digests + transfer_digests):
+                if tx_digest:
+                    print(f"   ✅ Transaction prepared: {tx_digest}")
+                    results[follower] = TradeCopied(
+                        follower=follower,
+                        trader=trade.trader,
+                        amount=str(copy_amount),
+                        success=True,
+                        tx_digest=tx_digest
+                    )
+                else:
+                    results[follower] = failed(follower, "Transaction failed", str(copy_amount))
         
-        # Execute the transaction
-        # Note: This will show the command to run manually for security
-        # To fully automate, you'd need to set up wallet with private keys
-        tx_digest = tx_executor.execute_sui_transfer(
-            from_address=follower,
-            to_address=trade.trader,  # Simplified: send to trader
-            amount=copy_amount
-        )
-        
-        if tx_digest:
-            print(f"   ✅ Transaction prepared: {tx_digest}")
-            return TradeCopied(
-                follower=follower,
-                trader=trade.trader,
-                amount=str(copy_amount),
-                success=True,
-                tx_digest=tx_digest
-            )
+        finally:
+            state.release_senders(claimed)
+    
+    for follower, copy_span in copy_spans.items():
+        result = results.get(follower)
+        if result is None:
+            # Queued in the coalescer; flush_coalesced_copies traces its execution
+            tracing.end_span(copy_span, queued=True)
         else:
-            return TradeCopied(
-                follower=follower,
-                trader=trade.trader,
-                amount=str(copy_amount),
-                success=False,
-                error="Transaction failed"
+            tracing.end_span(
+                copy_span,
+                error=None if result.success else result.error,
+                success=result.success,
+                copy_tx_digest=result.tx_digest or ""
             )
-    except Exception as e:
-        return TradeCopied(
-            follower=follower,
-            trader=trade.trader,
-            amount=trade.amount,
-            success=False,
-            error=str(e)
-        )
+    
+    return [results[follower] for follower in followers if follower in results]
 
 
 # Load followed traders from smart contract
-def load_trader_to_followers_map() -> Dict[str, List[str]]:
+async def load_trader_to_followers_map() -> Dict[str, List[str]]:
     """
     Load trader->followers mapping from smart contract
     Returns: {"0xTrader1": ["0xUserA", "0xUserB"], ...}
     """
     try:
-        trader_map = contract_querier.get_trader_to_followers_map()
+        trader_map = await asyncio.get_running_loop().run_in_executor(
+            None, contract_querier.get_trader_to_followers_map
+        )
         return trader_map
     except Exception as e:
         print(f"⚠️ Could not load followers from contract: {e}")
@@ -342,37 +676,252 @@ def save_trade_history(history):
         print(f"⚠️ Could not save trade history: {e}")
 
 
+def record_copy_outcome(ctx: Context, trade: TradeDetected, result: TradeCopied):
+    """Log a copy outcome and write it to the history store, rollups and the UI history file"""
+    follower = result.follower
+    volume = int(result.amount) if result.amount.isdigit() else 0
+    
+    # A copy fills at the source trade's swap price; only executed copies move the follower's position
+    pnl = 0
+    if result.success:
+        try:
+            pnl = rollup_engine.realize_pnl(follower, trade.asset, volume, float(trade.price))
+        except ValueError:
+            pass
+    
+    # Every outcome goes to the indexed store, failures included
+    try:
+        history_store.record_copy(
+            trader=trade.trader,
+            follower=follower,
+            action=trade.action,
+            asset=trade.asset,
+            amount=trade.amount,
+            copy_amount=result.amount,
+            success=result.success,
+            trader_tx_digest=trade.tx_digest,
+            copy_tx_digest=result.tx_digest,
+            error=result.error,
+            price=trade.price,
+            pnl=pnl
+        )
+    except Exception as e:
+        ctx.logger.error(f"   ⚠️ Could not record copy in history store: {e}")
+    
+    rollup_engine.record_copy(
+        trader=trade.trader,
+        follower=follower,
+        success=result.success,
+        volume=volume,
+        pnl=pnl
+    )
+    
+    if result.success:
+        ctx.logger.info(f"   ✅ Copied for {usernames.display(follower)} TX: {result.tx_digest[:16]}...")
+        
+        # Demo digests never land on chain, so there is nothing to confirm
+        if not result.tx_digest.startswith("0xMOCK_DIGEST"):
+            finality_tracker.track(result.tx_digest, follower)
+        
+        # Store in history
+        trade_record = {
+            "timestamp": datetime.now().isoformat(),
+            "trader": trade.trader,
+            "follower": follower,
+            "traderName": usernames.lookup(trade.trader),
+            "followerName": usernames.lookup(follower),
+            "action": trade.action,
+            "asset": trade.asset,
+            "amount": trade.amount,
+            "success": True,
+            "txDigest": trade.tx_digest
+        }
+        state.trade_history.append(trade_record)
+        
+        # Save to file for UI to read
+        save_trade_history(state.trade_history)
+    else:
+        ctx.logger.error(f"   ❌ Copy failed for {usernames.display(follower)}: {result.error}")
+
+
+async def execute_coalesced_batches(batches: List[CoalescedBatch]) -> List[Tuple[TradeDetected, TradeCopied]]:
+    """
+    Execute one net transaction per coalesced batch (all batches pre-flighted together)
+    and fan each outcome back out per source trade. Batches whose follower already
+    has a copy in flight (e.g. a second asset) are requeued for the next flush.
+    The net amount is capped again by the traders' max trade sizes and the
+    follower's remaining exposure, since it can add up past what each trade was sized to.
+    Each executed batch gets a "copy" span in the trace of its latest source trade.
+    """
+    outcomes: Dict[int, Tuple[Optional[str], Optional[str]]] = {}  # batch index -> (digest, error)
+    copy_spans: Dict[int, Optional[tracing.Span]] = {}
+    copy_amounts: Dict[int, int] = {}
+    requests = []
+    prepared = []
+    deferred = set()
+    claimed = []
+    
+    # Settings for every follower/trader pair in the flush (usually cached)
+    pairs = list(dict.fromkeys((batch.follower, trader) for batch in batches for trader in batch.traders))
+    pair_settings = dict(zip(pairs, await fetch_settings(pairs)))
+    exposure_used: Dict[str, int] = {}
+    
+    for index, batch in enumerate(batches):
+        print(f"\n🧺 Executing coalesced copy for {batch.follower[:8]}...")
+        print(f"   {len(batch.entries)} trade(s) from {len(batch.traders)} trader(s) on {batch.key}")
+        print(f"   Net: {batch.asset} {batch.copy_amount} MIST")
+        
+        settings = [pair_settings[(batch.follower, trader)] for trader in batch.traders]
+        unusable = [s for s in settings if not isinstance(s, dict)]
+        if unusable:
+            outcomes[index] = (None, str(unusable[0]) if unusable[0] else "No settings found")
+            continue
+        copy_amount = min([batch.copy_amount] + [int(s.get('max_trade_size', 100000000)) for s in settings])
+        exposure_capped = False
+        if FOLLOWER_EXPOSURE_LIMIT:
+            if batch.follower not in exposure_used:
+                rollup = rollup_engine.get("follower", batch.follower)
+                exposure_used[batch.follower] = rollup["24h"]["volume"] if rollup else 0
+            headroom = max(FOLLOWER_EXPOSURE_LIMIT - exposure_used[batch.follower], 0)
+            exposure_capped = copy_amount > headroom
+            copy_amount = min(copy_amount, headroom)
+        if copy_amount != batch.copy_amount:
+            print(f"   ✂️  Capped to {copy_amount} MIST")
+        
+        if copy_amount < MIN_COPY_AMOUNT:
+            outcomes[index] = (None, STATUS_ERRORS[STATUS_EXPOSURE_LIMIT] if exposure_capped else "Netted out below minimum")
+            continue
+        if not state.claim_sender(batch.follower):
+            print(f"   ⏳ Deferred: {batch.follower[:8]}... already has a copy in flight")
+            copy_coalescer.requeue(batch)
+            deferred.add(index)
+            continue
+        claimed.append(batch.follower)
+        copy_amounts[index] = copy_amount
+        if batch.follower in exposure_used:
+            exposure_used[batch.follower] += copy_amount
+        copy_spans[index] = tracing.start_trace(
+            "copy",
+            batch.entries[-1].trade.tx_digest,
+            follower=batch.follower,
+            asset=batch.asset,
+            coalesced_trades=len(batch.entries),
+            trade_digests=",".join(entry.trade.tx_digest for entry in batch.entries)
+        )
+        # Simplified like single copies: send to the trader with the largest contribution
+        recipient = max(batch.entries, key=lambda entry: entry.amount).trader
+        tx_bytes = template_cache.fill(batch.follower, recipient, copy_amount)
+        if tx_bytes:
+            prepared.append((index, (batch.follower, tx_bytes)))
+        else:
+            requests.append((index, PreflightRequest(batch.follower, recipient, copy_amount)))
+    
+    try:
+        checked = await preflight_copies(
+            [request for _, request in requests],
+            [copy_spans[index] for index, _ in requests]
+        )
+        transfers = []
+        for (index, _), (request, gas_budget, error) in zip(requests, checked):
+            if error:
+                outcomes[index] = (None, error)
+                continue
+            transfers.append((index, (request.follower, request.recipient, request.amount, gas_budget)))
+        
+        prepared_digests, transfer_digests = await asyncio.gather(
+            submit_prepared([job for _, job in prepared], [copy_spans[index] for index, _ in prepared]),
+            submit_transfers([transfer for _, transfer in transfers], [copy_spans[index] for index, _ in transfers])
+        )
+        for (index, _), tx_digest in zip(prepared + transfers, prepared_digests + transfer_digests):
+            outcomes[index] = (tx_digest, None if tx_digest else "Transaction failed")
+    finally:
+        state.release_senders(claimed)
+    
+    for index, copy_span in copy_spans.items():
+        tx_digest, error = outcomes.get(index, (None, "Not executed"))
+        tracing.end_span(copy_span, error=error, success=tx_digest is not None, copy_tx_digest=tx_digest or "")
+    
+    def entry_amount(index: int, batch: CoalescedBatch, entry) -> int:
+        # A capped batch executed only part of each source copy
+        if index in copy_amounts and copy_amounts[index] < batch.copy_amount:
+            return entry.amount * copy_amounts[index] // batch.copy_amount
+        return entry.amount
+    
+    return [
+        (entry.trade, TradeCopied(
+            follower=batch.follower,
+            trader=entry.trader,
+            amount=str(entry_amount(index, batch, entry)),
+            success=outcomes[index][0] is not None,
+            tx_digest=outcomes[index][0],
+            error=outcomes[index][1]
+        ))
+        for index, batch in enumerate(batches) if index not in deferred
+        for entry in batch.entries
+    ]
+
+
 # Agent Event Handlers
 @agent.on_event("startup")
+@profiler.profile("startup")
 async def startup(ctx: Context):
     """Agent startup - initialize monitoring"""
     ctx.logger.info("🚀 Copy Trading Agent starting up...")
     ctx.logger.info(f"   Agent Address: {agent.address}")
     ctx.logger.info(f"   Polling Interval: {POLLING_INTERVAL}s")
-    ctx.logger.info(f"   SUI RPC: {SUI_RPC_URL}")
+    ctx.logger.info(f"   SUI RPC: {', '.join(e.url for e in rpc_router.endpoints)}")
     ctx.logger.info(f"   📜 Contract Registry: {COPY_TRADING_REGISTRY_ID[:16]}...")
     
+    if HISTORY_API_PORT:
+        try:
+            start_history_api(
+                history_store,
+                HISTORY_API_PORT,
+                rollups=rollup_engine,
+                usernames=usernames,
+                communities=community_index
+            )
+            ctx.logger.info(f"   📚 History API: http://127.0.0.1:{HISTORY_API_PORT}/api/copies")
+        except OSError as e:
+            ctx.logger.error(f"   ❌ Could not start history API: {e}")
+    
+    # Catch up on usernames so logs and history show names from the first trade
+    synced = await asyncio.get_running_loop().run_in_executor(None, usernames.sync)
+    ctx.logger.info(f"   📇 Indexed {usernames.size()} username(s) from {synced} event(s)")
+    
+    # Bulk catch-up of community events since the persisted cursor
+    synced = await asyncio.get_running_loop().run_in_executor(None, community_index.sync)
+    ctx.logger.info(f"   🏘️  Indexed {len(community_index.communities)} communities ({synced} new event(s))")
+    
     # Load trader->followers mapping from smart contract
-    trader_map = load_trader_to_followers_map()
+    trader_map = await load_trader_to_followers_map()
     
     ctx.logger.info(f"   📊 Loaded {len(trader_map)} traders from smart contract")
     
     for trader, followers in trader_map.items():
         for follower in followers:
             state.add_follower(trader, follower)
-        ctx.logger.info(f"   📊 Monitoring trader: {trader[:16]}... ({len(followers)} follower(s))")
+        ctx.logger.info(f"   📊 Monitoring trader: {usernames.display(trader)} ({len(followers)} follower(s))")
+    
+    # Warm settings and transaction templates before the first trade arrives
+    template_cache.watch(
+        (follower, trader) for trader, followers in trader_map.items() for follower in followers
+    )
+    warmed = await asyncio.get_running_loop().run_in_executor(None, template_cache.refresh_stale)
+    ctx.logger.info(f"   🧩 Prepared {warmed} copy setting(s) and transaction template(s)")
     
     ctx.storage.set("initialized", True)
 
 
 @agent.on_interval(period=POLLING_INTERVAL)
+@profiler.profile("monitor_trades")
 async def monitor_trades(ctx: Context):
     """Periodic task to monitor traders and detect new trades"""
     if not ctx.storage.get("initialized"):
         return
     
     # Periodically reload trader->followers mapping from smart contract (every scan)
-    trader_map = load_trader_to_followers_map()
+    trader_map = await load_trader_to_followers_map()
     
     # Clear current state and rebuild from contract
     state.monitored_traders.clear()
@@ -381,6 +930,9 @@ async def monitor_trades(ctx: Context):
     for trader, followers in trader_map.items():
         for follower in followers:
             state.add_follower(trader, follower)
+    template_cache.watch(
+        (follower, trader) for trader, followers in trader_map.items() for follower in followers
+    )
     
     if not state.monitored_traders:
         ctx.logger.info("⏸️  No traders being followed. Waiting...")
@@ -392,78 +944,139 @@ async def monitor_trades(ctx: Context):
         if not followers:
             continue
         
-        # Query recent transactions (in descending order - newest first)
-        transactions = await query_sui_transactions(trader, limit=5)
+        # Query transactions back to this trader's watermark (newest first)
+        query_started_ns = time.time_ns()
+        if detection_watermarks.knows(trader):
+            transactions = await query_unseen_transactions(trader)
+        else:
+            transactions, _ = await query_sui_transactions(trader, limit=DETECTION_PAGE_SIZE)
+        query_ended_ns = time.time_ns()
         
         if not transactions:
             continue
         
-        # Check if this is the first scan for this trader
-        if trader not in state.last_processed_tx:
-            # On first scan, just record the most recent tx and don't process old ones
-            state.last_processed_tx[trader] = transactions[0].get("digest", "")
-            ctx.logger.info(f"   📌 Initialized tracking for {trader[:16]}... (skipping {len(transactions)} old transactions)")
+        # Check if this is the first scan for this trader (the watermark survives restarts)
+        if not detection_watermarks.knows(trader):
+            # On first scan, just record the newest checkpoint and don't process old ones
+            skipped = detection_watermarks.initialize(trader, transactions)
+            ctx.logger.info(f"   📌 Initialized tracking for {usernames.display(trader)} (skipping {skipped} old transactions)")
             continue
         
-        # Get the last processed transaction digest
-        last_digest = state.last_processed_tx.get(trader, "")
-        
-        # Find new transactions (stop when we hit the last processed one)
-        new_transactions = []
-        for tx in transactions:
-            tx_digest = tx.get("digest", "")
-            if tx_digest == last_digest:
-                # We've reached the last transaction we processed, stop here
-                break
-            new_transactions.append(tx)
+        # Claim transactions above the watermark (oldest first); a digest is only ever claimed once
+        new_transactions = detection_watermarks.claim_new(trader, transactions)
         
         # If no new transactions, continue
         if not new_transactions:
             continue
         
-        # Process new transactions in reverse order (oldest new transaction first)
-        for tx in reversed(new_transactions):
-            tx_digest = tx.get("digest", "")
+        for tx in new_transactions:
+            tx_digest = tx.digest
             
             # Analyze the transaction
             trade = await analyze_trade(tx)
             
             if trade:
                 ctx.logger.info(f"🎯 New trade detected!")
-                ctx.logger.info(f"   Trader: {trade.trader[:16]}...")
+                ctx.logger.info(f"   Trader: {usernames.display(trade.trader)}")
                 ctx.logger.info(f"   Action: {trade.action}")
                 ctx.logger.info(f"   Asset: {trade.asset}")
                 ctx.logger.info(f"   Amount: {trade.amount}")
                 ctx.logger.info(f"   TX: {tx_digest[:16]}...")
                 
-                # Copy trade for all followers
-                for follower in followers:
-                    result = await execute_copy_trade(follower, trade)
+                # One trace per trade, from the moment it landed on chain until its copies are submitted
+                landed_ns = tx.timestamp_ms * 1_000_000 or query_started_ns
+                with tracing.trace("trade", tx_digest, start_ns=landed_ns, trader=trader, action=trade.action):
+                    tracing.record_span("polling", landed_ns, query_started_ns)
+                    tracing.record_span("query_sui_transactions", query_started_ns, query_ended_ns)
                     
-                    if result.success:
-                        ctx.logger.info(f"   ✅ Copied for {follower[:16]}... TX: {result.tx_digest[:16]}...")
-                        
-                        # Store in history
-                        trade_record = {
-                            "timestamp": datetime.now().isoformat(),
-                            "trader": trade.trader,
-                            "follower": follower,
-                            "action": trade.action,
-                            "asset": trade.asset,
-                            "amount": trade.amount,
-                            "success": True,
-                            "txDigest": trade.tx_digest
-                        }
-                        state.trade_history.append(trade_record)
-                        
-                        # Save to file for UI to read
-                        save_trade_history(state.trade_history)
-                    else:
-                        ctx.logger.error(f"   ❌ Copy failed for {follower[:16]}...: {result.error}")
+                    # Copy trade for all followers (one "copy" span each)
+                    results = await execute_copy_trades(followers, trade)
+                    for result in results:
+                        record_copy_outcome(ctx, trade, result)
         
-        # Update last processed to the most recent transaction
-        state.last_processed_tx[trader] = transactions[0].get("digest", "")
-        ctx.logger.info(f"   ✅ Processed {len(new_transactions)} new transaction(s) for {trader[:16]}...")
+        ctx.logger.info(f"   ✅ Processed {len(new_transactions)} new transaction(s) for {usernames.display(trader)}")
+    
+    # Persist rollups touched during this scan
+    rollup_engine.save()
+
+
+@agent.on_interval(period=1)
+async def flush_coalesced_copies(ctx: Context):
+    """Execute coalesced batches whose window has closed"""
+    batches = copy_coalescer.due()
+    if not batches:
+        return
+    
+    for trade, result in await execute_coalesced_batches(batches):
+        record_copy_outcome(ctx, trade, result)
+    rollup_engine.save()
+
+
+def on_copy_finalized(result: FinalityResult):
+    """Write the on-chain outcome to the ledger and drop the follower's stale cached state"""
+    reversed_rows = history_store.update_finality(result.digest, result.status, result.gas_used, result.success)
+    for row in reversed_rows:
+        # Recorded as succeeded at submission; take it back out of the rollups and the position
+        volume = int(row["copy_amount"]) if (row["copy_amount"] or "").isdigit() else 0
+        try:
+            price = float(row["price"] or 0)
+        except ValueError:
+            price = 0.0
+        rollup_engine.unrealize_pnl(row["follower"], row["asset"] or "", volume, price, row["pnl"])
+        rollup_engine.reverse_success(
+            trader=row["trader"],
+            follower=row["follower"],
+            volume=volume,
+            ts=row["ts_ms"] / 1000,
+            pnl=row["pnl"]
+        )
+    if result.follower:
+        tx_executor.invalidate(result.follower)
+        if not result.success:
+            # The template's coin balance assumed this copy would go through
+            template_cache.mark_stale(result.follower)
+    if not result.success:
+        print(f"❌ Copy {result.digest[:16]}... {result.status}: {result.error}")
+
+
+finality_tracker.add_listener(on_copy_finalized)
+
+
+@agent.on_interval(period=FINALITY_POLL_INTERVAL)
+async def confirm_copies(ctx: Context):
+    """Confirm all submitted copies with one bulk RPC per 50 digests"""
+    if not finality_tracker.pending_count():
+        return
+    
+    # Bulk status RPCs; listeners (ledger and rollup corrections) run on the worker thread
+    finished = await asyncio.get_running_loop().run_in_executor(None, finality_tracker.poll)
+    if finished:
+        confirmed = sum(1 for result in finished if result.success)
+        ctx.logger.info(f"🔒 Finalized {len(finished)} copy transaction(s): {confirmed} succeeded")
+
+
+@agent.on_interval(period=TEMPLATE_MAX_AGE / 2)
+async def refresh_templates(ctx: Context):
+    """Refetch copy settings and transaction templates before they age out"""
+    if not ctx.storage.get("initialized"):
+        return
+    await asyncio.get_running_loop().run_in_executor(None, template_cache.refresh_stale)
+
+
+@agent.on_interval(period=USERNAME_SYNC_INTERVAL)
+async def sync_usernames(ctx: Context):
+    """Pick up UsernameSet events published since the last sync"""
+    if not ctx.storage.get("initialized"):
+        return
+    await asyncio.get_running_loop().run_in_executor(None, usernames.sync)
+
+
+@agent.on_interval(period=COMMUNITY_SYNC_INTERVAL)
+async def sync_communities(ctx: Context):
+    """Apply community and DAO membership events published since the last sync"""
+    if not ctx.storage.get("initialized"):
+        return
+    await asyncio.get_running_loop().run_in_executor(None, community_index.sync)
 
 
 @agent.on_message(model=TradeDetected)
@@ -473,11 +1086,33 @@ async def handle_trade_detected(ctx: Context, sender: str, msg: TradeDetected):
     # This handler can be used for inter-agent communication
 
 
+@agent.on_message(model=ProfileRequest)
+async def handle_profile_request(ctx: Context, sender: str, msg: ProfileRequest):
+    """Arm (or with ticks=0, disarm) tick profiling from a trusted local control agent"""
+    if sender not in PROFILE_CONTROL_SENDERS:
+        ctx.logger.warning(f"🚫 Ignoring profile request from {sender}")
+        return
+    profiler.arm(msg.task, msg.ticks)
+    ctx.logger.info(f"🔬 Profiling armed: {profiler.armed() or 'off'} (output: {PROFILE_DIR})")
+
+
 @agent.on_event("shutdown")
 async def shutdown(ctx: Context):
     """Agent shutdown"""
     ctx.logger.info("👋 Copy Trading Agent shutting down...")
+    
+    # Don't strand copies that are still waiting in a coalescing window
+    for trade, result in await execute_coalesced_batches(copy_coalescer.drain()):
+        record_copy_outcome(ctx, trade, result)
+    if copy_coalescer.pending_count():
+        ctx.logger.warning(f"   ⚠️ {copy_coalescer.pending_count()} copy(ies) left pending behind an in-flight transaction")
+    
     ctx.logger.info(f"   Total trades copied: {len(state.trade_history)}")
+    rollup_engine.close()
+    detection_watermarks.close()
+    tracing.shutdown()
+    if signing_service:
+        signing_service.close()
 
 
 # Main execution
@@ -0,0 +1,98 @@
+"""
+Batch Copy Sizing
+Sizes one detected trade for every follower in a single vectorized pass
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+MIN_COPY_AMOUNT = 1_000_000   # 0.001 SUI - anything smaller is dust
+GAS_RESERVE = 10_000_000      # 0.01 SUI kept back for gas
+
+INT64_MAX = np.iinfo(np.int64).max
+
+# Per-follower outcome codes
+STATUS_OK = 0
+STATUS_DISABLED = 1
+STATUS_DUST = 2
+STATUS_INSUFFICIENT_BALANCE = 3
+STATUS_EXPOSURE_LIMIT = 4
+
+STATUS_ERRORS = {
+    STATUS_DISABLED: "Auto-copy disabled",
+    STATUS_DUST: "Copy amount below minimum",
+    STATUS_INSUFFICIENT_BALANCE: "Insufficient balance",
+    STATUS_EXPOSURE_LIMIT: "Exposure limit reached",
+}
+
+
+def _column(values, default: Optional[int] = None, length: int = 0) -> np.ndarray:
+    if values is None:
+        return np.full(length, default if default is not None else INT64_MAX, dtype=np.int64)
+    try:
+        return np.asarray(values, dtype=np.int64)
+    except OverflowError:
+        # Clip huge u64 settings (e.g. "no cap") into int64 range
+        return np.array([min(int(v), INT64_MAX) for v in values], dtype=np.int64)
+
+
+class CopySizing:
+    """Columnar result of size_copies; row i belongs to follower i"""
+
+    __slots__ = ("copy_amounts", "status")
+
+    def __init__(self, copy_amounts: np.ndarray, status: np.ndarray):
+        self.copy_amounts = copy_amounts
+        self.status = status
+
+    def error_for(self, index: int) -> Optional[str]:
+        return STATUS_ERRORS.get(int(self.status[index]))
+
+
+def size_copies(
+    original_amount: int,
+    copy_percentage: Sequence[int],
+    max_trade_size: Sequence[int],
+    balance: Sequence[int],
+    auto_copy_enabled: Optional[Sequence[bool]] = None,
+    exposure_used: Optional[Sequence[int]] = None,
+    exposure_limit: Optional[Sequence[int]] = None,
+    min_amount: int = MIN_COPY_AMOUNT,
+    gas_reserve: int = GAS_RESERVE,
+) -> CopySizing:
+    """
+    Apply copy percentage, max trade size, remaining exposure, the dust
+    floor and the gas reserve to every follower at once. Checks run in
+    that order and the first one that fails sets the follower's status.
+    """
+    pct = _column(copy_percentage)
+    count = len(pct)
+    cap = _column(max_trade_size)
+    bal = _column(balance)
+    used = _column(exposure_used, default=0, length=count)
+    limit = _column(exposure_limit, length=count)
+    enabled = (
+        np.ones(count, dtype=bool) if auto_copy_enabled is None
+        else np.asarray(auto_copy_enabled, dtype=bool)
+    )
+
+    # floor(amount * pct / 100) without overflowing int64 for large u64 amounts
+    original = min(int(original_amount), INT64_MAX)
+    whole, rest = divmod(original, 100)
+    amounts = whole * pct + (rest * pct) // 100
+
+    amounts = np.minimum(amounts, cap)
+    headroom = np.maximum(limit - used, 0)
+    exposure_capped = amounts > headroom
+    amounts = np.minimum(amounts, headroom)
+
+    status = np.full(count, STATUS_OK, dtype=np.int8)
+    below_floor = amounts < min_amount
+    status[below_floor] = STATUS_DUST
+    status[below_floor & exposure_capped] = STATUS_EXPOSURE_LIMIT
+    # Compare as balance - reserve so amount + reserve cannot overflow
+    status[(status == STATUS_OK) & (amounts > bal - gas_reserve)] = STATUS_INSUFFICIENT_BALANCE
+    status[~enabled] = STATUS_DISABLED
+
+    return CopySizing(amounts, status)
@@ -0,0 +1,148 @@
+"""
+Finality Tracker
+Confirms submitted copy transactions in bulk with sui_multiGetTransactionBlocks
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from rate_limiter import PRIORITY_DEFAULT
+from rpc_profiles import profile
+from rpc_router import RpcRouter
+
+# Most fullnodes cap sui_multiGetTransactionBlocks at 50 digests per call
+MAX_DIGESTS_PER_CALL = 50
+
+STATUS_SUCCESS = "success"
+STATUS_FAILURE = "failure"
+STATUS_EXPIRED = "expired"  # never showed up on chain within the timeout
+
+
+class FinalityResult:
+    __slots__ = ("digest", "follower", "status", "gas_used", "error")
+
+    def __init__(
+        self,
+        digest: str,
+        follower: Optional[str],
+        status: str,
+        gas_used: int = 0,
+        error: Optional[str] = None,
+    ):
+        self.digest = digest
+        self.follower = follower
+        self.status = status
+        self.gas_used = gas_used
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        return self.status == STATUS_SUCCESS
+
+
+def gas_used_from_effects(effects: Dict) -> int:
+    """Net gas charged: computation + storage - storage rebate"""
+    gas = effects.get("gasUsed", {})
+    return (
+        int(gas.get("computationCost", 0))
+        + int(gas.get("storageCost", 0))
+        - int(gas.get("storageRebate", 0))
+    )
+
+
+class FinalityTracker:
+    def __init__(self, router: RpcRouter, timeout: float = 120):
+        self.router = router
+        self.timeout = timeout
+        self._pending: Dict[str, Dict] = {}  # digest -> {"follower", "submitted_at"}
+        self._listeners: List[Callable[[FinalityResult], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[FinalityResult], None]):
+        """Called once per digest when its outcome is known"""
+        self._listeners.append(listener)
+
+    def track(self, digest: str, follower: Optional[str] = None):
+        with self._lock:
+            self._pending.setdefault(digest, {
+                "follower": follower,
+                "submitted_at": time.monotonic(),
+            })
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _fetch(self, digests: List[str]) -> List[Dict]:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sui_multiGetTransactionBlocks",
+            "params": [
+                digests,
+                profile("finality")
+            ]
+        }
+        result = self.router.call(payload, priority=PRIORITY_DEFAULT)
+        return result.get("result") or []
+
+    def poll(self) -> List[FinalityResult]:
+        """
+        Check every pending digest, MAX_DIGESTS_PER_CALL per RPC.
+        Returns the digests that reached a final state on this poll.
+        """
+        with self._lock:
+            pending = dict(self._pending)
+        if not pending:
+            return []
+
+        digests = list(pending)
+        finished: List[FinalityResult] = []
+
+        for start in range(0, len(digests), MAX_DIGESTS_PER_CALL):
+            chunk = digests[start:start + MAX_DIGESTS_PER_CALL]
+            try:
+                blocks = self._fetch(chunk)
+            except Exception as e:
+                print(f"⚠️ Error polling transaction finality: {e}")
+                continue
+
+            for block in blocks:
+                if not block or "effects" not in block:
+                    continue  # not indexed yet (notExists) - try again next poll
+                digest = block.get("digest")
+                if digest not in pending:
+                    continue
+                status = block["effects"].get("status", {})
+                finished.append(FinalityResult(
+                    digest=digest,
+                    follower=pending[digest]["follower"],
+                    status=STATUS_SUCCESS if status.get("status") == "success" else STATUS_FAILURE,
+                    gas_used=gas_used_from_effects(block["effects"]),
+                    error=status.get("error"),
+                ))
+
+        done = {result.digest for result in finished}
+        now = time.monotonic()
+        for digest, info in pending.items():
+            if digest not in done and now - info["submitted_at"] > self.timeout:
+                finished.append(FinalityResult(
+                    digest=digest,
+                    follower=info["follower"],
+                    status=STATUS_EXPIRED,
+                    error=f"Not found on chain after {self.timeout:.0f}s",
+                ))
+
+        with self._lock:
+            for result in finished:
+                self._pending.pop(result.digest, None)
+
+        for result in finished:
+            for listener in self._listeners:
+                try:
+                    listener(result)
+                except Exception as e:
+                    print(f"⚠️ Finality listener failed for {result.digest[:16]}...: {e}")
+
+        return finished
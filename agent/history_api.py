@@ -0,0 +1,224 @@
+"""
+Copy History API
+Local read-only HTTP API over the HistoryStore for the UI
+
+    GET /health
+    GET /api/copies?follower=&trader=&asset=&since=&until=&cursor=&limit=
+    GET /api/copies/counts?follower=&trader=&asset=
+    GET /api/rollups?kind=trader|follower&address=
+    GET /api/leaderboard?kind=trader|follower&window=1h|24h|7d|all&metric=&limit=
+    GET /api/communities?member=
+    GET /api/communities/detail?id=
+    GET /api/communities/members?community=&member=
+    GET /api/communities/messages?community=&limit=
+
+since/until are epoch milliseconds. Pass next_cursor from one page as
+cursor to fetch the next. Each page carries totals for the whole query when
+a running counter covers it exactly (no since/until and at most one of
+follower/trader/asset), otherwise null. /api/copies/counts returns the all-time
+totals overall and per given scope separately. With a username resolver, copies carry
+traderName/followerName and leaderboard entries carry name (null if unset).
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from community_indexer import CommunityIndexer
+from history_store import HistoryStore
+from rollups import RollupEngine
+from username_resolver import UsernameResolver
+
+ALLOWED_ORIGINS = {"http://localhost:3001", "http://localhost:3000"}
+
+
+def _int_param(params, name: str) -> Optional[int]:
+    values = params.get(name)
+    if not values or values[0] == "":
+        return None
+    return int(values[0])
+
+
+def _str_param(params, name: str) -> Optional[str]:
+    values = params.get(name)
+    return values[0] if values and values[0] else None
+
+
+def make_handler(
+    store: HistoryStore,
+    rollups: Optional[RollupEngine] = None,
+    usernames: Optional[UsernameResolver] = None,
+    communities: Optional[CommunityIndexer] = None,
+    rollups_ttl: Optional[float] = None,
+    reload_communities: bool = False,
+):
+    """
+    rollups_ttl and reload_communities are for a sidecar that only reads what the
+    agent saves: the rollup snapshot is re-read when it is older than rollups_ttl
+    seconds, and the community index whenever its state file changes.
+    """
+
+    def current_rollups() -> Optional[RollupEngine]:
+        if rollups and rollups_ttl is not None:
+            rollups.reload_if_older(rollups_ttl)
+        return rollups
+
+    def current_communities() -> Optional[CommunityIndexer]:
+        if communities and reload_communities:
+            communities.reload_if_changed()
+        return communities
+
+    def with_copy_names(page: dict) -> dict:
+        if usernames and page["copies"]:
+            names = usernames.resolve_many(
+                address for copy in page["copies"] for address in (copy["trader"], copy["follower"])
+            )
+            for copy in page["copies"]:
+                copy["traderName"] = names[copy["trader"]]
+                copy["followerName"] = names[copy["follower"]]
+        return page
+
+    def with_leader_names(leaders: list) -> list:
+        if usernames and leaders:
+            names = usernames.resolve_many(leader["address"] for leader in leaders)
+            for leader in leaders:
+                leader["name"] = names[leader["address"]]
+        return leaders
+
+    class HistoryHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            origin = self.headers.get("Origin")
+            if origin in ALLOWED_ORIGINS:
+                self.send_header("Access-Control-Allow-Origin", origin)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            try:
+                if url.path == "/health":
+                    self._send_json(200, {"status": "ok", "message": "History API running"})
+                elif url.path == "/api/copies":
+                    self._send_json(200, with_copy_names(store.query_copies(
+                        follower=_str_param(params, "follower"),
+                        trader=_str_param(params, "trader"),
+                        asset=_str_param(params, "asset"),
+                        since_ms=_int_param(params, "since"),
+                        until_ms=_int_param(params, "until"),
+                        cursor=_int_param(params, "cursor"),
+                        limit=_int_param(params, "limit") or 50,
+                    )))
+                elif url.path == "/api/copies/counts":
+                    self._send_json(200, store.counts(
+                        follower=_str_param(params, "follower"),
+                        trader=_str_param(params, "trader"),
+                        asset=_str_param(params, "asset"),
+                    ))
+                elif url.path == "/api/rollups" and rollups:
+                    kind = _str_param(params, "kind") or "trader"
+                    address = _str_param(params, "address") or ""
+                    snapshot = current_rollups().get(kind, address)
+                    if snapshot is None:
+                        self._send_json(404, {"error": f"No rollups for {kind} {address}"})
+                    else:
+                        self._send_json(200, {"kind": kind, "address": address, "windows": snapshot})
+                elif url.path == "/api/leaderboard" and rollups:
+                    self._send_json(200, {"leaders": with_leader_names(current_rollups().leaderboard(
+                        kind=_str_param(params, "kind") or "trader",
+                        window=_str_param(params, "window") or "24h",
+                        metric=_str_param(params, "metric") or "volume",
+                        limit=min(_int_param(params, "limit") or 10, 100),
+                    ))})
+                elif url.path == "/api/communities" and communities:
+                    member = _str_param(params, "member") or ""
+                    self._send_json(200, {"member": member, "communities": current_communities().communities_of(member)})
+                elif url.path == "/api/communities/detail" and communities:
+                    community_id = _str_param(params, "id") or ""
+                    community = current_communities().community(community_id)
+                    if community is None:
+                        self._send_json(404, {"error": f"Unknown community {community_id}"})
+                    else:
+                        self._send_json(200, community)
+                elif url.path == "/api/communities/members" and communities:
+                    community_id = _str_param(params, "community") or ""
+                    member = _str_param(params, "member")
+                    if member:
+                        self._send_json(200, {"community": community_id, "member": member,
+                                              "isMember": current_communities().is_member(community_id, member)})
+                    else:
+                        self._send_json(200, {"community": community_id, "members": current_communities().members_of(community_id)})
+                elif url.path == "/api/communities/messages" and communities:
+                    self._send_json(200, {"messages": current_communities().recent_messages(
+                        _str_param(params, "community") or "",
+                        limit=min(_int_param(params, "limit") or 50, 100),
+                    )})
+                else:
+                    self._send_json(404, {"error": "Not found"})
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid parameter: {e}"})
+            except Exception as e:
+                print(f"❌ History API error: {e}")
+                self._send_json(500, {"error": "Failed to query history"})
+
+        def log_message(self, *args):
+            pass
+
+    return HistoryHandler
+
+
+def start_history_api(
+    store: HistoryStore,
+    port: int,
+    rollups: Optional[RollupEngine] = None,
+    host: str = "127.0.0.1",
+    usernames: Optional[UsernameResolver] = None,
+    communities: Optional[CommunityIndexer] = None,
+) -> ThreadingHTTPServer:
+    """Serve the history API on a daemon thread and return the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(store, rollups, usernames, communities))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Run as a sidecar next to the agent
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from rpc_router import RpcRouter
+
+    load_dotenv()
+
+    db_path = os.getenv("HISTORY_DB_PATH", os.path.join(os.path.dirname(__file__), "copy_history.db"))
+    port = int(os.getenv("HISTORY_API_PORT", "3003"))
+
+    # Names come from the same UsernameSet events the agent reads; fill the index once up front
+    rpc_urls = os.getenv("SUI_RPC_URLS", os.getenv("SUI_RPC_URL", "https://rpc-testnet.suiscan.xyz:443"))
+    usernames = None
+    username_package = os.getenv("USERNAME_REGISTRY_PACKAGE_ID", "")
+    if username_package:
+        usernames = UsernameResolver(RpcRouter.from_env_value(rpc_urls), username_package)
+        usernames.sync()
+
+    # Rollups and community membership are served from the last snapshots the agent persisted;
+    # the community index is empty until the agent first saves it, then follows each save
+    community_index_path = os.getenv("COMMUNITY_INDEX_PATH", os.path.join(os.path.dirname(__file__), "community_index.json"))
+    communities = CommunityIndexer(RpcRouter.from_env_value(rpc_urls), "", state_path=community_index_path)
+
+    # The agent saves rollups every monitoring tick; re-read them at most this often
+    rollups_ttl = float(os.getenv("HISTORY_API_ROLLUPS_TTL", "5"))
+
+    handler = make_handler(
+        HistoryStore(db_path), RollupEngine(db_path), usernames, communities,
+        rollups_ttl=rollups_ttl, reload_communities=True,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    print(f"📚 History API serving {db_path} on http://127.0.0.1:{port}")
+    server.serve_forever()
@@ -0,0 +1,255 @@
+"""
+Copy History Store
+Indexed SQLite store of every copy outcome, queried by the history API
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+MAX_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS copies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts_ms INTEGER NOT NULL,
+    trader TEXT NOT NULL,
+    follower TEXT NOT NULL,
+    action TEXT,
+    asset TEXT,
+    amount TEXT,
+    copy_amount TEXT,
+    price TEXT,
+    pnl INTEGER NOT NULL DEFAULT 0,
+    success INTEGER NOT NULL,
+    trader_tx_digest TEXT,
+    copy_tx_digest TEXT,
+    error TEXT,
+    effects_status TEXT,
+    gas_used INTEGER,
+    finalized_at_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_copies_follower ON copies (follower, id);
+CREATE INDEX IF NOT EXISTS idx_copies_trader ON copies (trader, id);
+CREATE INDEX IF NOT EXISTS idx_copies_asset ON copies (asset, id);
+CREATE INDEX IF NOT EXISTS idx_copies_ts ON copies (ts_ms, id);
+CREATE INDEX IF NOT EXISTS idx_copies_copy_tx ON copies (copy_tx_digest);
+
+-- Running totals maintained on insert so counts never need a table scan
+CREATE TABLE IF NOT EXISTS copy_counts (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, key)
+);
+"""
+
+# Filters that have a precomputed count, keyed by column name
+COUNT_SCOPES = ("trader", "follower", "asset")
+
+
+class HistoryStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def record_copy(
+        self,
+        trader: str,
+        follower: str,
+        action: str,
+        asset: str,
+        amount: str,
+        copy_amount: str,
+        success: bool,
+        trader_tx_digest: str,
+        copy_tx_digest: Optional[str] = None,
+        error: Optional[str] = None,
+        ts_ms: Optional[int] = None,
+        price: Optional[str] = None,
+        pnl: int = 0,
+    ) -> int:
+        """
+        Insert one copy outcome and bump the precomputed counts; returns the row id.
+        price is the source trade's swap price, pnl the copy's realised PnL in MIST.
+        """
+        ts_ms = ts_ms if ts_ms is not None else int(time.time() * 1000)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO copies (ts_ms, trader, follower, action, asset, amount, copy_amount,
+                                    price, pnl, success, trader_tx_digest, copy_tx_digest, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (ts_ms, trader, follower, action, asset, amount, copy_amount,
+                 price, int(pnl), int(success), trader_tx_digest, copy_tx_digest, error),
+            )
+            keys = [("all", ""), ("trader", trader), ("follower", follower), ("asset", asset or "")]
+            self._conn.executemany(
+                """
+                INSERT INTO copy_counts (scope, key, total, succeeded) VALUES (?, ?, 1, ?)
+                ON CONFLICT (scope, key) DO UPDATE SET
+                    total = total + 1,
+                    succeeded = succeeded + excluded.succeeded
+                """,
+                [(scope, key, int(success)) for scope, key in keys],
+            )
+            return cursor.lastrowid
+
+    def update_finality(
+        self,
+        copy_tx_digest: str,
+        effects_status: str,
+        gas_used: int = 0,
+        success: bool = True,
+    ) -> List[Dict]:
+        """
+        Record the on-chain outcome of a copy transaction. A copy that failed
+        or expired on chain is no longer counted as succeeded; returns the rows
+        that were flipped so callers can correct their own aggregates.
+        """
+        with self._lock, self._conn:
+            reversed_rows = [] if success else self._conn.execute(
+                """
+                SELECT ts_ms, trader, follower, asset, copy_amount, price, pnl FROM copies
+                WHERE copy_tx_digest = ? AND success = 1
+                """,
+                (copy_tx_digest,),
+            ).fetchall()
+            self._conn.execute(
+                """
+                UPDATE copies SET effects_status = ?, gas_used = ?, finalized_at_ms = ?,
+                                  success = CASE WHEN ? THEN success ELSE 0 END
+                WHERE copy_tx_digest = ?
+                """,
+                (effects_status, int(gas_used), int(time.time() * 1000), int(success), copy_tx_digest),
+            )
+            for row in reversed_rows:
+                self._conn.executemany(
+                    "UPDATE copy_counts SET succeeded = succeeded - 1 WHERE scope = ? AND key = ?",
+                    [("all", ""), ("trader", row["trader"]), ("follower", row["follower"]), ("asset", row["asset"] or "")],
+                )
+            return [dict(row) for row in reversed_rows]
+
+    def query_copies(
+        self,
+        follower: Optional[str] = None,
+        trader: Optional[str] = None,
+        asset: Optional[str] = None,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+        cursor: Optional[int] = None,
+        limit: int = 50,
+    ) -> Dict:
+        """
+        Newest-first keyset pagination. Pass the returned next_cursor back
+        as cursor to get the following page; it is None on the last page.
+        totals counts every row matching the query when a running counter covers
+        it exactly (no time range and at most one of follower/trader/asset);
+        otherwise it is None.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        filters = [(column, value) for column, value in (("follower", follower), ("trader", trader), ("asset", asset)) if value]
+        clauses = [f"{column} = ?" for column, _ in filters]
+        params = [value for _, value in filters]
+
+        with self._lock:
+            # ts_ms grows with id, so the time range becomes an id range (one
+            # lookup on idx_copies_ts each) and every query stays a keyset scan on id
+            if since_ms is not None:
+                first_id = self._first_id_at(int(since_ms))
+                clauses.append("id >= ?")
+                params.append(first_id if first_id is not None else 1 << 62)  # nothing that late: past every id
+            if until_ms is not None:
+                end_id = self._first_id_at(int(until_ms))
+                if end_id is not None:
+                    clauses.append("id < ?")
+                    params.append(end_id)
+            if cursor is not None:
+                clauses.append("id < ?")
+                params.append(int(cursor))
+
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            sql = f"SELECT * FROM copies {where} ORDER BY id DESC LIMIT ?"
+            params.append(limit + 1)
+            rows = self._conn.execute(sql, params).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        totals = None
+        if since_ms is None and until_ms is None and len(filters) <= 1:
+            scope, key = filters[0] if filters else ("all", "")
+            totals = self._counter(scope, key)
+        return {
+            "copies": [self._row_to_dict(row) for row in rows],
+            "next_cursor": rows[-1]["id"] if has_more else None,
+            "totals": totals,
+        }
+
+    def _first_id_at(self, ts_ms: int) -> Optional[int]:
+        """Id of the first copy at or after ts_ms (None if there is none); caller holds the lock"""
+        row = self._conn.execute(
+            "SELECT id FROM copies WHERE ts_ms >= ? ORDER BY ts_ms, id LIMIT 1", (ts_ms,)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def _counter(self, scope: str, key: str) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total, succeeded FROM copy_counts WHERE scope = ? AND key = ?",
+                (scope, key),
+            ).fetchone()
+        total, succeeded = (row["total"], row["succeeded"]) if row else (0, 0)
+        return {"total": total, "succeeded": succeeded, "failed": total - succeeded}
+
+    def counts(
+        self,
+        follower: Optional[str] = None,
+        trader: Optional[str] = None,
+        asset: Optional[str] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Precomputed all-time totals overall and separately for each scope that
+        was given (not their intersection, and without any time range)
+        """
+        wanted = [("all", "")]
+        for scope, value in (("trader", trader), ("follower", follower), ("asset", asset)):
+            if value:
+                wanted.append((scope, value))
+
+        return {scope: self._counter(scope, key) for scope, key in wanted}
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "timestamp": datetime.fromtimestamp(row["ts_ms"] / 1000).isoformat(),
+            "timestampMs": row["ts_ms"],
+            "trader": row["trader"],
+            "follower": row["follower"],
+            "action": row["action"],
+            "asset": row["asset"],
+            "amount": row["amount"],
+            "copyAmount": row["copy_amount"],
+            "price": row["price"],
+            "pnl": row["pnl"],
+            "success": bool(row["success"]),
+            "txDigest": row["trader_tx_digest"],
+            "copyTxDigest": row["copy_tx_digest"],
+            "error": row["error"],
+            "effectsStatus": row["effects_status"],
+            "gasUsed": row["gas_used"],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
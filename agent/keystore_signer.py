@@ -0,0 +1,140 @@
+"""
+Keystore Signer
+Ed25519 transaction signing for delegated/custodial keys held in a local Sui keystore
+"""
+
+import base64
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+SIGNATURE_FLAG_ED25519 = 0x00
+
+# IntentScope::TransactionData, IntentVersion::V0, AppId::Sui
+TRANSACTION_INTENT = bytes([0, 0, 0])
+
+DEFAULT_KEYSTORE_PATH = os.path.expanduser("~/.sui/sui_config/sui.keystore")
+
+
+def address_from_public_key(public_key: bytes) -> str:
+    digest = hashlib.blake2b(bytes([SIGNATURE_FLAG_ED25519]) + public_key, digest_size=32).digest()
+    return "0x" + digest.hex()
+
+
+def load_keystore(path: str) -> Dict[str, bytes]:
+    """
+    Read a sui.keystore (JSON list of base64 flag||private_key entries) and
+    return address -> Ed25519 seed. Other key schemes are skipped.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+
+    keys = {}
+    for entry in entries:
+        raw = base64.b64decode(entry)
+        if raw[0] != SIGNATURE_FLAG_ED25519 or len(raw) != 33:
+            continue
+        seed = raw[1:]
+        public_key = Ed25519PrivateKey.from_private_bytes(seed).public_key().public_bytes_raw()
+        keys[address_from_public_key(public_key)] = seed
+    return keys
+
+
+def sign_transaction(seed: bytes, tx_bytes: bytes) -> str:
+    """Serialized Sui signature (flag || signature || public key), base64"""
+    private_key = Ed25519PrivateKey.from_private_bytes(seed)
+    digest = hashlib.blake2b(TRANSACTION_INTENT + tx_bytes, digest_size=32).digest()
+    signature = private_key.sign(digest)
+    public_key = private_key.public_key().public_bytes_raw()
+    return base64.b64encode(bytes([SIGNATURE_FLAG_ED25519]) + signature + public_key).decode()
+
+
+# Each pool worker loads the keystore once so keys never travel with a job
+_worker_keys: Dict[str, bytes] = {}
+
+
+def _init_worker(keystore_path: str):
+    global _worker_keys
+    _worker_keys = load_keystore(keystore_path)
+
+
+def _sign_job(job: Tuple[str, bytes]) -> Optional[str]:
+    address, tx_bytes = job
+    seed = _worker_keys.get(address)
+    if seed is None:
+        return None
+    return sign_transaction(seed, tx_bytes)
+
+
+def _worker_ready() -> int:
+    return len(_worker_keys)
+
+
+@contextlib.contextmanager
+def _main_script_hidden():
+    """
+    Spawned workers re-run the parent's main script unless multiprocessing
+    cannot see it. Ours has module-level setup (agent, wallet funding, stores)
+    that must not run per worker, and the workers only need this module.
+    """
+    main = sys.modules["__main__"]
+    main_path = main.__dict__.pop("__file__", None)
+    try:
+        yield
+    finally:
+        if main_path is not None:
+            main.__file__ = main_path
+
+
+class SigningService:
+    def __init__(self, keystore_path: str = DEFAULT_KEYSTORE_PATH, use_processes: bool = True, workers: int = 2):
+        self.keystore_path = keystore_path
+        # The parent only keeps the address list; seeds live in the workers
+        self.addresses = set(load_keystore(keystore_path))
+
+        if use_processes:
+            # spawn, not fork: the agent process is already multithreaded, and a
+            # forked child can inherit locks held by threads that don't exist in it
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(keystore_path,),
+            )
+            # Start every worker now rather than lazily on the first signing job
+            with _main_script_hidden():
+                started = [self._pool.submit(_worker_ready) for _ in range(workers)]
+            for future in started:
+                future.result()
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(keystore_path,),
+            )
+
+    def has_key(self, address: str) -> bool:
+        return address in self.addresses
+
+    def sign(self, address: str, tx_bytes: bytes) -> Optional[str]:
+        """Signature for tx_bytes, or None if the keystore has no key for address"""
+        if not self.has_key(address):
+            return None
+        return self._pool.submit(_sign_job, (address, tx_bytes)).result()
+
+    def sign_many(self, jobs: List[Tuple[str, bytes]]) -> List[Optional[str]]:
+        """Sign a batch of (address, tx_bytes); results keep input order"""
+        if not jobs:
+            return []
+        chunksize = max(1, len(jobs) // 8)
+        return list(self._pool.map(_sign_job, jobs, chunksize=chunksize))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,126 @@
+"""
+Pre-flight Simulation
+Dry-runs every pending copy in one tick so failing copies are dropped and
+the rest are submitted with a measured gas budget
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from finality_tracker import gas_used_from_effects
+from sui_executor import SuiTransactionExecutor
+from sui_tx_builder import to_base64
+from tracing import Span, bind
+
+# Budget the simulated transaction is built with; it only has to be high enough to run
+PROBE_GAS_BUDGET = 50_000_000
+# Sui rejects budgets below the minimum transaction cost
+MIN_GAS_BUDGET = 2_000_000
+
+
+class PreflightRequest:
+    __slots__ = ("follower", "recipient", "amount")
+
+    def __init__(self, follower: str, recipient: str, amount: int):
+        self.follower = follower
+        self.recipient = recipient
+        self.amount = amount
+
+
+class PreflightResult:
+    __slots__ = ("request", "ok", "gas_budget", "gas_used", "error")
+
+    def __init__(
+        self,
+        request: PreflightRequest,
+        ok: bool,
+        gas_budget: int = 0,
+        gas_used: int = 0,
+        error: Optional[str] = None,
+    ):
+        self.request = request
+        self.ok = ok
+        self.gas_budget = gas_budget
+        self.gas_used = gas_used
+        self.error = error
+
+
+def budget_from_effects(effects: dict, margin_pct: int) -> int:
+    """
+    Gas budget that covers the simulated charge plus a safety margin. The
+    budget must cover computation + storage up front; the rebate is only
+    refunded afterwards, so it is not subtracted here.
+    """
+    gas = effects.get("gasUsed", {})
+    charged = int(gas.get("computationCost", 0)) + int(gas.get("storageCost", 0))
+    return max(MIN_GAS_BUDGET, charged + charged * margin_pct // 100)
+
+
+class PreflightSimulator:
+    def __init__(
+        self,
+        executor: SuiTransactionExecutor,
+        max_concurrency: int = 8,
+        gas_margin_pct: int = 20,
+    ):
+        self.executor = executor
+        self.gas_margin_pct = gas_margin_pct
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def simulate(self, request: PreflightRequest) -> PreflightResult:
+        balance = self.executor.get_balance(request.follower)
+        # Never probe with more gas than the follower could actually pay
+        probe_budget = min(PROBE_GAS_BUDGET, balance - request.amount)
+        if probe_budget < MIN_GAS_BUDGET:
+            return PreflightResult(request, False, error="Insufficient balance for gas")
+
+        if self.executor.can_sign(request.follower):
+            # We hold the key, so the transaction is built locally anyway - skip the builder RPC
+            local_bytes = self.executor.build_local_transfer(
+                request.follower, request.recipient, request.amount, probe_budget
+            )
+            tx_bytes = to_base64(local_bytes) if local_bytes else None
+        else:
+            tx_bytes = self.executor.build_transfer_bytes(
+                from_address=request.follower,
+                to_address=request.recipient,
+                amount=request.amount,
+                gas_budget=probe_budget
+            )
+        if not tx_bytes:
+            return PreflightResult(request, False, error="Could not build transaction")
+
+        effects = self.executor.dry_run_transaction(tx_bytes)
+        if not effects:
+            return PreflightResult(request, False, error="Dry run failed")
+
+        status = effects.get("status", {})
+        if status.get("status") != "success":
+            return PreflightResult(request, False, error=f"Simulation failed: {status.get('error', 'unknown')}")
+
+        return PreflightResult(
+            request,
+            True,
+            gas_budget=budget_from_effects(effects, self.gas_margin_pct),
+            gas_used=gas_used_from_effects(effects),
+        )
+
+    def simulate_many(
+        self,
+        requests: List[PreflightRequest],
+        spans: Optional[List[Optional[Span]]] = None,
+    ) -> List[PreflightResult]:
+        """
+        Simulate a tick's worth of copies, at most max_concurrency in flight; results
+        keep input order. spans optionally gives each request a parent span.
+        """
+        if not requests:
+            return []
+        jobs = [bind(self._simulate_safely, parent) for parent in spans or [None] * len(requests)]
+        return list(self._pool.map(lambda job, request: job(request), jobs, requests))
+
+    def _simulate_safely(self, request: PreflightRequest) -> PreflightResult:
+        try:
+            return self.simulate(request)
+        except Exception as e:
+            return PreflightResult(request, False, error=str(e))
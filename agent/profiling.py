@@ -0,0 +1,121 @@
+"""
+Tick Profiling
+On-demand cProfile capture of the agent's handlers for the next N ticks
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import time
+from typing import Callable, Coroutine, Dict
+
+
+class _ProfiledSteps:
+    """
+    Awaitable that runs a coroutine one step at a time with the profiler enabled
+    only while that coroutine itself is executing. cProfile left on across an
+    await would also record every other coroutine the event loop runs meanwhile.
+    """
+
+    def __init__(self, coro: Coroutine, profiler: cProfile.Profile):
+        self.coro = coro
+        self.profiler = profiler
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profiler.enable()
+            try:
+                if error is None:
+                    future = self.coro.send(value)
+                else:
+                    future = self.coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profiler.disable()
+            # Hand the awaited future to the task and resume with its outcome
+            try:
+                value, error = (yield future), None
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+class TickProfiler:
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self._remaining: Dict[str, int] = {}  # task -> ticks still to capture
+        self._captured: Dict[str, int] = {}
+
+    @classmethod
+    def from_env_value(cls, value: str, output_dir: str) -> "TickProfiler":
+        """
+        PROFILE_TICKS style config: comma-separated task[:ticks] entries,
+        e.g. "monitor_trades:5,startup" (ticks default to 1)
+        """
+        profiler = cls(output_dir)
+        for entry in filter(None, (part.strip() for part in value.split(","))):
+            task, _, ticks = entry.partition(":")
+            profiler.arm(task, int(ticks or 1))
+        return profiler
+
+    def arm(self, task: str, ticks: int):
+        """Capture the next `ticks` runs of task (0 disarms it)"""
+        if ticks > 0:
+            self._remaining[task] = ticks
+        else:
+            self._remaining.pop(task, None)
+
+    def armed(self) -> Dict[str, int]:
+        return dict(self._remaining)
+
+    def profile(self, task: str) -> Callable:
+        """Decorator for async handlers; costs one dict lookup per call while disarmed"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if task not in self._remaining:
+                    return await func(*args, **kwargs)
+
+                profiler = cProfile.Profile()
+                started = time.perf_counter()
+                try:
+                    return await _ProfiledSteps(func(*args, **kwargs), profiler)
+                finally:
+                    self._finish(task, profiler, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def _finish(self, task: str, profiler: cProfile.Profile, elapsed: float):
+        remaining = self._remaining.get(task, 0) - 1
+        if remaining > 0:
+            self._remaining[task] = remaining
+        else:
+            self._remaining.pop(task, None)
+
+        tick = self._captured.get(task, 0) + 1
+        self._captured[task] = tick
+        base = os.path.join(self.output_dir, f"{task}-{time.strftime('%Y%m%d-%H%M%S')}-{tick:03d}")
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            # Binary pstats: load with pstats, snakeviz, or flameprof/gprof2dot for a flamegraph
+            profiler.dump_stats(base + ".prof")
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+            with open(base + ".txt", "w") as f:
+                f.write(f"{task} tick {tick}: {elapsed * 1000:.1f} ms wall\n")
+                # Wall time also covers awaits; the profile below does not
+                f.write(
+                    "Only this task's own steps on the event loop are profiled. Time spent awaiting "
+                    "(RPCs, executor threads, other coroutines) is in the wall time but not below.\n\n"
+                )
+                f.write(report.getvalue())
+            print(f"🔬 Profiled {task} tick {tick} ({elapsed * 1000:.1f} ms) -> {base}.prof")
+        except OSError as e:
+            print(f"⚠️ Could not write profile for {task}: {e}")
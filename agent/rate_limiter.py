@@ -0,0 +1,114 @@
+"""
+Sui RPC Rate Limiter
+Shared token bucket that keeps all agent RPC traffic under the provider's quota
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Optional
+
+# Priority classes - lower value is served first when callers are queued
+PRIORITY_TRADE = 0        # trade detection, follower settings, balances, execution
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2   # registry refresh, health checks
+
+# Relative cost of each method against the provider quota. Anything not
+# listed costs 1 token.
+DEFAULT_METHOD_WEIGHTS: Dict[str, float] = {
+    "suix_queryTransactionBlocks": 2,
+    "suix_queryEvents": 2,
+    "sui_multiGetTransactionBlocks": 2,
+    "sui_multiGetObjects": 2,
+    "sui_dryRunTransactionBlock": 2,
+    "sui_devInspectTransactionBlock": 2,
+    "sui_executeTransactionBlock": 1,
+}
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        method_weights: Optional[Dict[str, float]] = None,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate  # tokens per second
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.method_weights = dict(DEFAULT_METHOD_WEIGHTS)
+        if method_weights:
+            self.method_weights.update(method_weights)
+
+        self.tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+    def weight_for(self, method: Optional[str]) -> float:
+        weight = self.method_weights.get(method, 1)
+        # A weight above the bucket size could never be satisfied
+        return min(weight, self.burst)
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def acquire(self, method: Optional[str] = None, priority: int = PRIORITY_DEFAULT) -> float:
+        """
+        Block until the request fits in the bucket; returns seconds waited.
+        Queued callers are served strictly by priority, then arrival order.
+        """
+        weight = self.weight_for(method)
+        start = time.monotonic()
+
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    if self._waiters[0] == ticket:
+                        if now < self._paused_until:
+                            self._cond.wait(self._paused_until - now)
+                            continue
+                        if self.tokens >= weight:
+                            self.tokens -= weight
+                            return time.monotonic() - start
+                        self._cond.wait((weight - self.tokens) / self.rate)
+                    else:
+                        # Someone more urgent is ahead of us - wait for our turn
+                        self._cond.wait()
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def try_acquire(self, method: Optional[str] = None) -> bool:
+        """Take tokens only if they are free right now and nobody is queued"""
+        weight = self.weight_for(method)
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if self._waiters or now < self._paused_until or self.tokens < weight:
+                return False
+            self.tokens -= weight
+            return True
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. after the provider returns 429"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            # Nothing refills while paused
+            self._last_refill = self._paused_until
+            self._cond.notify_all()
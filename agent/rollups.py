@@ -0,0 +1,331 @@
+"""
+Performance Rollups
+Streaming per-trader and per-follower aggregates over sliding windows
+"""
+
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# window name -> (span seconds, bucket seconds)
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    "1h": (3600, 60),
+    "24h": (86400, 3600),
+    "7d": (7 * 86400, 6 * 3600),
+}
+
+METRICS = ("copies", "succeeded", "volume", "pnl")
+N_METRICS = len(METRICS)
+
+ENTITY_KINDS = ("trader", "follower")
+
+# Realised PnL is counted for swaps into and out of this coin, in its base units (MIST)
+PNL_COIN = "SUI"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (kind, entity)
+);
+
+-- Open position per follower and coin, bought with PNL_COIN at average cost
+CREATE TABLE IF NOT EXISTS positions (
+    follower TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (follower, coin)
+);
+"""
+
+
+class WindowedCounter:
+    """
+    Sliding-window sums kept as fixed-size time buckets plus a running
+    total, so adding an event and reading the window are both O(1)
+    (expiring old buckets is amortised over the adds that created them).
+    """
+
+    __slots__ = ("span", "bucket_size", "buckets", "totals")
+
+    def __init__(self, span: int, bucket_size: int):
+        self.span = span
+        self.bucket_size = bucket_size
+        self.buckets = deque()  # [bucket_start, copies, succeeded, volume, pnl]
+        self.totals = [0] * N_METRICS
+
+    def expire(self, now: float):
+        cutoff = now - self.span
+        while self.buckets and self.buckets[0][0] + self.bucket_size <= cutoff:
+            old = self.buckets.popleft()
+            for i in range(N_METRICS):
+                self.totals[i] -= old[i + 1]
+
+    def add(self, ts: float, values: Tuple[int, ...]):
+        start = int(ts // self.bucket_size) * self.bucket_size
+        if self.buckets and self.buckets[-1][0] >= start:
+            # Same bucket as the latest event (or slightly out of order)
+            bucket = next((b for b in reversed(self.buckets) if b[0] <= start), None)
+            if bucket is None:
+                return  # older than anything the window still holds
+        else:
+            bucket = [start] + [0] * N_METRICS
+            self.buckets.append(bucket)
+        for i in range(N_METRICS):
+            bucket[i + 1] += values[i]
+            self.totals[i] += values[i]
+        self.expire(ts)
+
+    def to_state(self) -> List:
+        return [list(b) for b in self.buckets]
+
+    def load_state(self, buckets: List):
+        self.buckets = deque(list(b) for b in buckets)
+        self.totals = [sum(b[i + 1] for b in self.buckets) for i in range(N_METRICS)]
+
+
+class EntityRollup:
+    __slots__ = ("windows", "all_time")
+
+    def __init__(self):
+        self.windows = {name: WindowedCounter(span, size) for name, (span, size) in WINDOWS.items()}
+        self.all_time = [0] * N_METRICS
+
+    def add(self, ts: float, values: Tuple[int, ...]):
+        for counter in self.windows.values():
+            counter.add(ts, values)
+        for i in range(N_METRICS):
+            self.all_time[i] += values[i]
+
+    def totals(self, window: str, now: float) -> List[int]:
+        if window == "all":
+            return self.all_time
+        counter = self.windows[window]
+        counter.expire(now)
+        return counter.totals
+
+    def snapshot(self, now: float) -> Dict[str, Dict]:
+        result = {}
+        for window in list(WINDOWS) + ["all"]:
+            copies, succeeded, volume, pnl = self.totals(window, now)
+            result[window] = {
+                "copies": copies,
+                "succeeded": succeeded,
+                "success_rate": round(succeeded / copies, 4) if copies else 0.0,
+                "volume": volume,
+                "pnl": pnl,
+            }
+        return result
+
+    def to_state(self) -> Dict:
+        return {
+            "all_time": self.all_time,
+            "windows": {name: counter.to_state() for name, counter in self.windows.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "EntityRollup":
+        rollup = cls()
+        rollup.all_time = list(state.get("all_time", [0] * N_METRICS))
+        for name, buckets in state.get("windows", {}).items():
+            if name in rollup.windows:
+                rollup.windows[name].load_state(buckets)
+        return rollup
+
+
+class RollupEngine:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._rollups: Dict[str, Dict[str, EntityRollup]] = {kind: {} for kind in ENTITY_KINDS}
+        self._dirty = set()
+        self._positions: Dict[Tuple[str, str], List[float]] = {}  # (follower, coin) -> [quantity, cost]
+        self._dirty_positions = set()
+        self.loaded_at = 0.0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.load()
+
+    def record_copy(
+        self,
+        trader: str,
+        follower: str,
+        success: bool,
+        volume: int,
+        pnl: int = 0,
+        ts: Optional[float] = None,
+    ):
+        """
+        Fold one copy outcome into the trader's and follower's rollups.
+        volume and pnl (from realize_pnl) count only successful copies.
+        """
+        ts = ts if ts is not None else time.time()
+        values = (1, int(success), int(volume) if success else 0, int(pnl) if success else 0)
+        with self._lock:
+            for kind, entity in (("trader", trader), ("follower", follower)):
+                rollup = self._rollups[kind].get(entity)
+                if rollup is None:
+                    rollup = self._rollups[kind][entity] = EntityRollup()
+                rollup.add(ts, values)
+                self._dirty.add((kind, entity))
+
+    def reverse_success(self, trader: str, follower: str, volume: int, ts: float, pnl: int = 0):
+        """
+        Un-count a copy recorded as succeeded at ts that later failed or expired
+        on chain (window buckets that have already expired are left alone)
+        """
+        values = (0, -1, -int(volume), -int(pnl))
+        with self._lock:
+            for kind, entity in (("trader", trader), ("follower", follower)):
+                rollup = self._rollups[kind].get(entity)
+                if rollup is None:
+                    continue
+                rollup.add(ts, values)
+                self._dirty.add((kind, entity))
+
+    def realize_pnl(self, follower: str, asset: str, amount: int, price: float) -> int:
+        """
+        Apply a successful swap copy to the follower's position and return its
+        realised PnL in MIST. Buying a coin with SUI adds to the position at
+        average cost; selling it back for SUI realises proceeds minus the cost
+        of the sold quantity. Other swaps and transfers realise nothing.
+        """
+        if "/" not in asset or price <= 0 or amount <= 0:
+            return 0
+        outgoing, incoming = asset.split("/", 1)
+        with self._lock:
+            if outgoing == PNL_COIN and incoming != PNL_COIN:
+                position = self._positions.setdefault((follower, incoming), [0.0, 0.0])
+                position[0] += amount * price
+                position[1] += amount
+                self._dirty_positions.add((follower, incoming))
+                return 0
+            if incoming == PNL_COIN and outgoing != PNL_COIN:
+                position = self._positions.setdefault((follower, outgoing), [0.0, 0.0])
+                covered = min(amount, position[0])
+                basis = position[1] * covered / position[0] if covered > 0 else 0.0
+                position[0] -= covered
+                position[1] -= basis
+                self._dirty_positions.add((follower, outgoing))
+                # Any quantity beyond the position wasn't bought through copies: no PnL on it
+                return int(covered * price - basis)
+        return 0
+
+    def unrealize_pnl(self, follower: str, asset: str, amount: int, price: float, pnl: int):
+        """
+        Undo realize_pnl for a copy that failed or expired on chain. A sell puts
+        back what it realised against: the sold quantity at proceeds minus pnl.
+        """
+        if "/" not in asset or price <= 0 or amount <= 0:
+            return
+        outgoing, incoming = asset.split("/", 1)
+        with self._lock:
+            if outgoing == PNL_COIN and incoming != PNL_COIN:
+                position = self._positions.get((follower, incoming))
+                if position:
+                    position[0] = max(position[0] - amount * price, 0.0)
+                    position[1] = max(position[1] - amount, 0.0)
+                    self._dirty_positions.add((follower, incoming))
+            elif incoming == PNL_COIN and outgoing != PNL_COIN:
+                position = self._positions.setdefault((follower, outgoing), [0.0, 0.0])
+                position[0] += amount
+                position[1] += amount * price - pnl
+                self._dirty_positions.add((follower, outgoing))
+
+    def get(self, kind: str, entity: str, now: Optional[float] = None) -> Optional[Dict]:
+        now = now if now is not None else time.time()
+        with self._lock:
+            rollup = self._rollups[kind].get(entity)
+            return rollup.snapshot(now) if rollup else None
+
+    def leaderboard(
+        self,
+        kind: str = "trader",
+        window: str = "24h",
+        metric: str = "volume",
+        limit: int = 10,
+        now: Optional[float] = None,
+    ) -> List[Dict]:
+        """Top entities by a metric over a window (success_rate is also accepted)"""
+        if kind not in ENTITY_KINDS:
+            raise ValueError(f"Unknown kind: {kind}")
+        if window != "all" and window not in WINDOWS:
+            raise ValueError(f"Unknown window: {window}")
+        if metric not in METRICS and metric != "success_rate":
+            raise ValueError(f"Unknown metric: {metric}")
+
+        now = now if now is not None else time.time()
+
+        def score(item):
+            totals = item[1].totals(window, now)
+            if metric == "success_rate":
+                return totals[1] / totals[0] if totals[0] else 0.0
+            return totals[METRICS.index(metric)]
+
+        with self._lock:
+            top = heapq.nlargest(limit, self._rollups[kind].items(), key=score)
+            return [
+                {"address": entity, **rollup.snapshot(now)[window]}
+                for entity, rollup in top
+            ]
+
+    def load(self):
+        """Replace the in-memory rollups and positions with the persisted ones"""
+        with self._lock:
+            rollups = {kind: {} for kind in ENTITY_KINDS}
+            for kind, entity, state in self._conn.execute("SELECT kind, entity, state FROM rollups"):
+                if kind in rollups:
+                    rollups[kind][entity] = EntityRollup.from_state(json.loads(state))
+            self._rollups = rollups
+            self._positions = {
+                (follower, coin): [quantity, cost]
+                for follower, coin, quantity, cost in self._conn.execute(
+                    "SELECT follower, coin, quantity, cost FROM positions"
+                )
+            }
+            self.loaded_at = time.time()
+
+    def reload_if_older(self, max_age: float):
+        """
+        Re-read the snapshot another process (the agent) persists, at most once
+        per max_age seconds. Only for read-only engines: unsaved changes are lost.
+        """
+        if time.time() - self.loaded_at > max_age:
+            self.load()
+
+    def save(self):
+        """Persist rollups that changed since the last save"""
+        with self._lock:
+            if not self._dirty and not self._dirty_positions:
+                return
+            rows = [
+                (kind, entity, json.dumps(self._rollups[kind][entity].to_state()))
+                for kind, entity in self._dirty
+            ]
+            positions = [
+                (follower, coin, *self._positions[(follower, coin)])
+                for follower, coin in self._dirty_positions
+            ]
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rollups (kind, entity, state) VALUES (?, ?, ?)", rows
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO positions (follower, coin, quantity, cost) VALUES (?, ?, ?, ?)",
+                    positions
+                )
+            self._dirty.clear()
+            self._dirty_positions.clear()
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._conn.close()
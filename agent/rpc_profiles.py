@@ -0,0 +1,100 @@
+"""
+RPC Option Profiles
+Per-consumer response options and the slotted records their responses decode into
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:  # orjson is optional; the stdlib parser gives the same result, just slower
+    def loads(data: bytes):
+        return json.loads(data)
+
+
+# Ask the fullnode for exactly what each consumer reads. digest, timestampMs
+# and checkpoint are always returned for transaction blocks.
+PROFILES: Dict[str, Dict[str, bool]] = {
+    # analyze_trade: digest, timestamp and balance changes. The sender is the
+    # FromAddress we filtered on, so showInput is not needed.
+    "trade_scan": {"showBalanceChanges": True},
+    # FinalityTracker: effects status and gas
+    "finality": {"showEffects": True},
+    # ContractQuerier.query_object: the Move object's fields
+    "object_content": {"showContent": True},
+}
+
+
+def profile(name: str) -> Dict[str, bool]:
+    """A copy of a named option profile, safe to put straight into a payload"""
+    return dict(PROFILES[name])
+
+
+class BalanceChange:
+    __slots__ = ("owner", "coin_type", "amount")
+
+    def __init__(self, owner: str, coin_type: str, amount: int):
+        self.owner = owner
+        self.coin_type = coin_type
+        self.amount = amount
+
+    @property
+    def coin_symbol(self) -> str:
+        return self.coin_type.split("::")[-1]
+
+
+class TxSummary:
+    """The fields of a transaction block that trade detection uses, nothing else"""
+
+    __slots__ = ("digest", "timestamp_ms", "checkpoint", "sender", "balance_changes")
+
+    def __init__(
+        self,
+        digest: str,
+        timestamp_ms: int,
+        sender: str,
+        balance_changes: Tuple[BalanceChange, ...],
+        checkpoint: Optional[int] = None,
+    ):
+        self.digest = digest
+        self.timestamp_ms = timestamp_ms
+        self.checkpoint = checkpoint  # None until the transaction is in a checkpoint
+        self.sender = sender
+        self.balance_changes = balance_changes
+
+
+def _owner_address(owner) -> str:
+    if isinstance(owner, dict):
+        return owner.get("AddressOwner") or owner.get("ObjectOwner") or ""
+    return owner or ""
+
+
+def decode_tx_summaries(blocks: List[Dict], sender: Optional[str] = None) -> List[TxSummary]:
+    """
+    Turn trade_scan transaction blocks into TxSummary records. sender fills
+    in the sender when the block was fetched without showInput.
+    """
+    summaries = []
+    for block in blocks:
+        tx_sender = sender
+        if tx_sender is None:
+            tx_sender = block.get("transaction", {}).get("data", {}).get("sender", "")
+        summaries.append(TxSummary(
+            digest=block.get("digest", ""),
+            timestamp_ms=int(block.get("timestampMs") or 0),
+            checkpoint=int(block["checkpoint"]) if block.get("checkpoint") is not None else None,
+            sender=tx_sender,
+            balance_changes=tuple(
+                BalanceChange(
+                    owner=_owner_address(change.get("owner")),
+                    coin_type=change.get("coinType", ""),
+                    amount=int(change.get("amount", 0)),
+                )
+                for change in block.get("balanceChanges") or ()
+            ),
+        ))
+    return summaries
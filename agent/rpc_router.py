@@ -0,0 +1,302 @@
+"""
+Sui RPC Router
+Routes JSON-RPC calls across several fullnodes, preferring the fastest healthy one
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import requests
+
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_DEFAULT, TokenBucketLimiter
+from rpc_profiles import loads
+
+# Methods that change chain state are never hedged (sent to more than one node)
+WRITE_METHODS = {
+    "sui_executeTransactionBlock",
+}
+
+
+class RateLimited(requests.HTTPError):
+    """HTTP 429 from an endpoint; retry_after is how long it asked us to back off"""
+
+    def __init__(self, message: str, retry_after: float, response=None):
+        super().__init__(message, response=response)
+        self.retry_after = retry_after
+
+
+class EndpointStats:
+    """Rolling latency / error statistics for a single RPC endpoint"""
+
+    def __init__(self, url: str, alpha: float, window: int = 100):
+        self.url = url
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None  # seconds
+        self.error_ewma = 0.0  # 0.0 = always succeeds, 1.0 = always fails
+        self.recent_latencies = deque(maxlen=window)
+        self.checkpoint = 0
+        self.ejected = False
+
+    def record_success(self, latency: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+        self.error_ewma = (1 - self.alpha) * self.error_ewma
+        self.recent_latencies.append(latency)
+
+    def record_error(self):
+        self.error_ewma = self.alpha + (1 - self.alpha) * self.error_ewma
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency percentile over the recent window, None until we have samples"""
+        if not self.recent_latencies:
+            return None
+        ordered = sorted(self.recent_latencies)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+    def score(self) -> float:
+        """Lower is better. Unknown endpoints score 0 so they get probed early."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.0
+        return latency * (1 + 10 * self.error_ewma) + self.error_ewma
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "latency_ewma": self.latency_ewma,
+            "error_ewma": round(self.error_ewma, 4),
+            "p95": self.percentile(0.95),
+            "checkpoint": self.checkpoint,
+            "ejected": self.ejected,
+        }
+
+
+class RpcRouter:
+    def __init__(
+        self,
+        urls: List[str],
+        timeout: float = 10,
+        alpha: float = 0.2,
+        hedge_percentile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        default_hedge_delay: float = 1.0,
+        max_error_rate: float = 0.5,
+        max_checkpoint_lag: int = 20,
+        health_interval: float = 30,
+        limiter: Optional[TokenBucketLimiter] = None,
+        max_rate_limit_retries: int = 3,
+        max_concurrency: int = 32,
+    ):
+        urls = [url.strip() for url in urls if url and url.strip()]
+        if not urls:
+            raise ValueError("RpcRouter needs at least one endpoint")
+
+        self.endpoints = [EndpointStats(url, alpha) for url in urls]
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.max_error_rate = max_error_rate
+        self.max_checkpoint_lag = max_checkpoint_lag
+        self.health_interval = health_interval
+        self.limiter = limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        # Every hedged read runs here: room for max_concurrency callers each
+        # racing a primary and a backup
+        self._pool = ThreadPoolExecutor(max_workers=2 * max_concurrency)
+        self._last_health_check = 0.0
+        self._health_check_running = False
+
+    @classmethod
+    def from_env_value(cls, value: str, **kwargs) -> "RpcRouter":
+        """Build a router from a comma-separated endpoint list (e.g. SUI_RPC_URLS)"""
+        return cls(value.split(","), **kwargs)
+
+    @property
+    def primary_url(self) -> str:
+        return self.ranked_endpoints()[0].url
+
+    def ranked_endpoints(self) -> List[EndpointStats]:
+        """Healthy endpoints first, each group ordered by score"""
+        with self._lock:
+            healthy = [
+                e for e in self.endpoints
+                if not e.ejected and e.error_ewma < self.max_error_rate
+            ]
+            unhealthy = [e for e in self.endpoints if e not in healthy]
+            healthy.sort(key=lambda e: e.score())
+            unhealthy.sort(key=lambda e: e.score())
+            return healthy + unhealthy
+
+    def _post(self, endpoint: EndpointStats, payload: Dict, timeout: float) -> Dict:
+        start = time.monotonic()
+        try:
+            response = self.session.post(endpoint.url, json=payload, timeout=timeout)
+            if response.status_code == 429:
+                # Provider says we are over quota - everyone backs off together
+                retry_after = response.headers.get("Retry-After", "1")
+                retry_after = float(retry_after) if retry_after.isdigit() else 1.0
+                if self.limiter:
+                    self.limiter.pause(retry_after)
+                raise RateLimited(
+                    f"{endpoint.url} returned HTTP 429", retry_after, response=response
+                )
+            if response.status_code >= 500:
+                raise requests.HTTPError(
+                    f"{endpoint.url} returned HTTP {response.status_code}", response=response
+                )
+            result = loads(response.content)
+        except Exception:
+            with self._lock:
+                endpoint.record_error()
+            raise
+
+        with self._lock:
+            endpoint.record_success(time.monotonic() - start)
+        return result
+
+    def _hedge_delay(self, endpoint: EndpointStats) -> float:
+        with self._lock:
+            p = endpoint.percentile(self.hedge_percentile)
+        if p is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p)
+
+    def _acquire(self, method: Optional[str], priority: int):
+        if self.limiter:
+            self.limiter.acquire(method, priority)
+
+    def call(self, payload: Dict, timeout: Optional[float] = None, priority: int = PRIORITY_DEFAULT) -> Dict:
+        """
+        Send a JSON-RPC payload and return the decoded response body.
+        Reads are hedged: if the best endpoint is slower than its own p95,
+        the same request goes to the runner-up and the first answer wins.
+        With a limiter attached, callers wait for capacity in priority order.
+        Raises the last error if every endpoint fails.
+        """
+        timeout = timeout or self.timeout
+        method = payload.get("method")
+        self._maybe_check_health()
+
+        ranked = self.ranked_endpoints()
+        hedge = method not in WRITE_METHODS and len(ranked) > 1
+
+        if not hedge:
+            return self._call_with_failover(ranked, payload, timeout, priority)
+
+        primary, backup = ranked[0], ranked[1]
+        self._acquire(method, priority)
+        started = threading.Event()
+
+        def send_primary() -> Dict:
+            started.set()
+            return self._post(primary, payload, timeout)
+
+        pending = {self._pool.submit(send_primary)}
+        last_error: Optional[Exception] = None
+
+        # The hedge clock starts when the primary is actually sent, so time spent
+        # queued for a pool thread never makes a healthy node look slow
+        started.wait(timeout)
+        delay = self._hedge_delay(primary)
+        done, _ = wait(pending, timeout=delay)
+        primary_failed = bool(done) and next(iter(done)).exception() is not None
+        if primary_failed:
+            self._acquire(method, priority)
+            pending.add(self._pool.submit(self._post, backup, payload, timeout))
+        elif not done and (not self.limiter or self.limiter.try_acquire(method)):
+            # Primary is slow - race the runner-up, but only with spare quota
+            pending.add(self._pool.submit(self._post, backup, payload, timeout))
+
+        while pending:
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+
+        # Both raced endpoints failed - fall back to the rest in order. If we were
+        # only rate limited, go round again once the pause is over.
+        remaining = ranked[2:] if not isinstance(last_error, RateLimited) else ranked
+        if remaining:
+            return self._call_with_failover(remaining, payload, timeout, priority)
+        raise last_error or TimeoutError("RPC request timed out on all endpoints")
+
+    def _call_with_failover(
+        self, endpoints: List[EndpointStats], payload: Dict, timeout: float, priority: int
+    ) -> Dict:
+        last_error: Optional[Exception] = None
+        for endpoint in endpoints:
+            for _ in range(1 + self.max_rate_limit_retries):
+                # With a limiter, _acquire waits out any 429 pause before we retry
+                self._acquire(payload.get("method"), priority)
+                try:
+                    return self._post(endpoint, payload, timeout)
+                except RateLimited as e:
+                    last_error = e
+                    if not self.limiter:
+                        time.sleep(e.retry_after)
+                except Exception as e:
+                    last_error = e
+                    break
+        raise last_error or RuntimeError("No RPC endpoints available")
+
+    def _maybe_check_health(self):
+        """Kick off a background checkpoint check if one is due; never blocks the caller"""
+        now = time.monotonic()
+        with self._lock:
+            if self._health_check_running or now - self._last_health_check < self.health_interval:
+                return
+            self._health_check_running = True
+            self._last_health_check = now
+        self._pool.submit(self.check_health)
+
+    def check_health(self):
+        """
+        Query each endpoint's latest checkpoint and eject the ones that lag
+        the tip by more than max_checkpoint_lag
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sui_getLatestCheckpointSequenceNumber",
+            "params": []
+        }
+        try:
+            # Sequential on purpose: this already runs on a pool worker
+            heights = {}
+            for endpoint in self.endpoints:
+                self._acquire(payload["method"], PRIORITY_BACKGROUND)
+                try:
+                    heights[endpoint] = int(self._post(endpoint, payload, self.timeout)["result"])
+                except Exception:
+                    pass
+
+            if not heights:
+                return
+
+            tip = max(heights.values())
+            with self._lock:
+                for endpoint in self.endpoints:
+                    if endpoint in heights:
+                        endpoint.checkpoint = heights[endpoint]
+                        lagging = tip - endpoint.checkpoint > self.max_checkpoint_lag
+                        if lagging and not endpoint.ejected:
+                            print(f"⚠️ Ejecting {endpoint.url}: {tip - endpoint.checkpoint} checkpoints behind")
+                        endpoint.ejected = lagging
+        finally:
+            with self._lock:
+                self._health_check_running = False
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [e.to_dict() for e in self.endpoints]
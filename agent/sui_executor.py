@@ -5,20 +5,48 @@ Executes actual blockchain transactions for copy trading
 
 import os
 import json
-import requests
-from typing import Optional, Dict, List
+import time
+from typing import Callable, Optional, Dict, List, Tuple
 from dotenv import load_dotenv
 
+from keystore_signer import SigningService
+from rate_limiter import PRIORITY_TRADE
+from rpc_profiles import profile
+from rpc_router import RpcRouter
+from sui_tx_builder import build_sui_transfer, to_base64, transaction_digest
+from tracing import Span, record_span, traced, within
+
 load_dotenv()
 
 class SuiTransactionExecutor:
-    def __init__(self, rpc_url: str):
+    def __init__(
+        self,
+        rpc_url: str,
+        router: Optional[RpcRouter] = None,
+        balance_ttl: float = 5.0,
+        signer: Optional[SigningService] = None
+    ):
         self.rpc_url = rpc_url
+        self.router = router or RpcRouter([rpc_url])
         self.agent_address = os.getenv("AGENT_ADDRESS", "")
         
-        # For testnet demo, we'll use a simpler approach without private keys
-        # In production, you'd use the Sui SDK with proper key management
+        # Short-lived balance cache so sizing and execution share one lookup;
+        # entries are dropped as soon as one of our transactions finalizes
+        self.balance_ttl = balance_ttl
+        self._balances: Dict[str, Tuple[int, float]] = {}
+        self._gas_price: Optional[Tuple[int, float]] = None
+        
+        # Addresses with a key in the local keystore are built and signed in-process;
+        # everything else falls back to printing the CLI command for manual execution
+        self.signer = signer
         
+        # Called with the effects of every transaction we submit
+        self.effects_listeners: List[Callable[[Dict], None]] = []
+    
+    def can_sign(self, address: str) -> bool:
+        return self.signer is not None and self.signer.has_key(address)
+    
+    @traced("get_gas_coins")
     def get_gas_coins(self, address: str, amount: int = 100000000) -> List[Dict]:
         """Get available gas coins for an address"""
         try:
@@ -34,8 +62,7 @@ class SuiTransactionExecutor:
                 ]
             }
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
             
             if "result" in result and "data" in result["result"]:
                 return result["result"]["data"]
@@ -44,8 +71,13 @@ class SuiTransactionExecutor:
             print(f"❌ Error getting gas coins: {e}")
             return []
     
-    def get_balance(self, address: str) -> int:
+    @traced("get_balance")
+    def get_balance(self, address: str, use_cache: bool = True) -> int:
         """Get SUI balance for an address in MIST"""
+        cached = self._balances.get(address)
+        if use_cache and cached and time.monotonic() - cached[1] < self.balance_ttl:
+            return cached[0]
+        
         try:
             payload = {
                 "jsonrpc": "2.0",
@@ -54,16 +86,167 @@ class SuiTransactionExecutor:
                 "params": [address, "0x2::sui::SUI"]
             }
             
-            response = requests.post(self.rpc_url, json=payload, timeout=10)
-            result = response.json()
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
             
             if "result" in result:
-                return int(result["result"]["totalBalance"])
+                balance = int(result["result"]["totalBalance"])
+                self._balances[address] = (balance, time.monotonic())
+                return balance
             return 0
         except Exception as e:
             print(f"❌ Error getting balance: {e}")
             return 0
     
+    def invalidate(self, address: str):
+        """Forget cached state for an address, e.g. after its transaction finalized"""
+        self._balances.pop(address, None)
+    
+    @staticmethod
+    def select_coin_objects(coins: List[Dict], needed: int) -> List[Dict]:
+        """Largest-first coins until their balance covers needed; empty if it can't"""
+        selected = []
+        total = 0
+        for coin in sorted(coins, key=lambda c: int(c.get("balance", 0)), reverse=True):
+            selected.append(coin)
+            total += int(coin.get("balance", 0))
+            if total >= needed:
+                return selected
+        return []
+    
+    @classmethod
+    def select_coins(cls, coins: List[Dict], needed: int) -> List[str]:
+        """Largest-first coin IDs until their balance covers needed; empty if it can't"""
+        return [coin["coinObjectId"] for coin in cls.select_coin_objects(coins, needed)]
+    
+    @traced("get_reference_gas_price")
+    def get_reference_gas_price(self, max_age: float = 60.0) -> int:
+        """Reference gas price for the current epoch (cached; it only changes per epoch)"""
+        if self._gas_price and time.monotonic() - self._gas_price[1] < max_age:
+            return self._gas_price[0]
+        
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "suix_getReferenceGasPrice",
+            "params": []
+        }
+        result = self.router.call(payload, priority=PRIORITY_TRADE)
+        price = int(result["result"])
+        self._gas_price = (price, time.monotonic())
+        return price
+    
+    def build_local_transfer(
+        self,
+        from_address: str,
+        to_address: str,
+        amount: int,
+        gas_budget: int
+    ) -> Optional[bytes]:
+        """BCS TransactionData for a SUI transfer, built in-process"""
+        coins = self.select_coin_objects(self.get_gas_coins(from_address), amount + gas_budget)
+        if not coins:
+            print(f"   ❌ No suitable coins found")
+            return None
+        
+        return build_sui_transfer(
+            sender=from_address,
+            recipient=to_address,
+            amount=amount,
+            gas_payment=[(c["coinObjectId"], int(c["version"]), c["digest"]) for c in coins],
+            gas_price=self.get_reference_gas_price(),
+            gas_budget=gas_budget
+        )
+    
+    @traced("submission")
+    def submit_signed_transaction(self, tx_bytes: bytes, signature: str) -> Optional[str]:
+        """Submit a signed transaction; returns its digest (finality is confirmed separately)"""
+        try:
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "sui_executeTransactionBlock",
+                "params": [
+                    to_base64(tx_bytes),
+                    [signature],
+                    profile("finality"),
+                    "WaitForEffectsCert"
+                ]
+            }
+            
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
+            
+            if "result" in result:
+                effects = result["result"].get("effects")
+                if effects:
+                    for listener in self.effects_listeners:
+                        listener(effects)
+                return result["result"].get("digest") or transaction_digest(tx_bytes)
+            print(f"❌ Transaction rejected: {result.get('error')}")
+            return None
+        except Exception as e:
+            print(f"❌ Error submitting transaction: {e}")
+            return None
+    
+    def build_transfer_bytes(
+        self,
+        from_address: str,
+        to_address: str,
+        amount: int,
+        gas_budget: int
+    ) -> Optional[str]:
+        """
+        Have the fullnode build an unsigned SUI transfer (unsafe_paySui).
+        Returns base64 TransactionData bytes, or None if it can't be built.
+        """
+        try:
+            coins = self.select_coins(self.get_gas_coins(from_address), amount + gas_budget)
+            if not coins:
+                return None
+            
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "unsafe_paySui",
+                "params": [
+                    from_address,
+                    coins,
+                    [to_address],
+                    [str(amount)],
+                    str(gas_budget)
+                ]
+            }
+            
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
+            
+            if "result" in result:
+                return result["result"]["txBytes"]
+            print(f"❌ Could not build transfer: {result.get('error')}")
+            return None
+        except Exception as e:
+            print(f"❌ Error building transfer: {e}")
+            return None
+    
+    @traced("dry_run")
+    def dry_run_transaction(self, tx_bytes: str) -> Optional[Dict]:
+        """Simulate TransactionData bytes; returns the effects dict or None"""
+        try:
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "sui_dryRunTransactionBlock",
+                "params": [tx_bytes]
+            }
+            
+            result = self.router.call(payload, priority=PRIORITY_TRADE)
+            
+            if "result" in result and "effects" in result["result"]:
+                return result["result"]["effects"]
+            print(f"❌ Dry run rejected: {result.get('error')}")
+            return None
+        except Exception as e:
+            print(f"❌ Error during dry run: {e}")
+            return None
+    
     def execute_sui_transfer(
         self,
         from_address: str,
@@ -86,6 +269,13 @@ class SuiTransactionExecutor:
                 print(f"❌ Insufficient balance: {balance} MIST, need {total_needed} MIST")
                 return None
             
+            if self.can_sign(from_address):
+                tx_bytes = self.build_local_transfer(from_address, to_address, amount, gas_budget)
+                if not tx_bytes:
+                    return None
+                signature = self.signer.sign(from_address, tx_bytes)
+                return self.submit_signed_transaction(tx_bytes, signature)
+            
             # For testnet demo, we'll construct the transaction but not execute it
             # In production with proper wallet setup, this would use pysui to execute
             
@@ -121,6 +311,76 @@ class SuiTransactionExecutor:
             print(f"❌ Error executing transfer: {e}")
             return None
     
+    def execute_sui_transfers(
+        self,
+        transfers: List[Tuple[str, str, int, int]],
+        spans: Optional[List[Optional[Span]]] = None
+    ) -> List[Optional[str]]:
+        """
+        Execute (from, to, amount, gas_budget) transfers; the ones we hold keys
+        for are built first and signed in one sign_many batch. Results keep input order.
+        spans optionally gives each transfer a parent span for its stages.
+        """
+        spans = spans or [None] * len(transfers)
+        digests: List[Optional[str]] = [None] * len(transfers)
+        signable = []  # (index, from_address, tx_bytes)
+        
+        for index, (from_address, to_address, amount, gas_budget) in enumerate(transfers):
+            with within(spans[index]):
+                if not self.can_sign(from_address):
+                    digests[index] = self.execute_sui_transfer(from_address, to_address, amount, gas_budget)
+                    continue
+                try:
+                    if self.get_balance(from_address) < amount + gas_budget:
+                        print(f"❌ Insufficient balance for {from_address[:16]}...")
+                        continue
+                    tx_bytes = self.build_local_transfer(from_address, to_address, amount, gas_budget)
+                    if tx_bytes:
+                        signable.append((index, from_address, tx_bytes))
+                except Exception as e:
+                    print(f"❌ Error building transfer: {e}")
+        
+        submitted = self.submit_prepared(
+            [(address, tx) for _, address, tx in signable],
+            [spans[index] for index, _, _ in signable]
+        )
+        for (index, _, _), digest in zip(signable, submitted):
+            digests[index] = digest
+        
+        return digests
+    
+    def submit_prepared(
+        self,
+        prepared: List[Tuple[str, bytes]],
+        spans: Optional[List[Optional[Span]]] = None
+    ) -> List[Optional[str]]:
+        """
+        Sign (address, tx_bytes) pairs in one sign_many batch and submit them; results keep input order.
+        With spans, each transaction's signing (the shared batch) and submission are recorded under its span.
+        """
+        if not prepared:
+            return []
+        spans = spans or [None] * len(prepared)
+        if any(spans):
+            signing_started_ns = time.time_ns()
+            signatures = self.signer.sign_many(prepared)
+            signing_ended_ns = time.time_ns()
+            for parent in spans:
+                if parent:
+                    record_span("signing", signing_started_ns, signing_ended_ns, parent=parent, batch_size=len(prepared))
+        else:
+            signatures = self._sign_batch(prepared)
+        
+        digests = []
+        for (_, tx_bytes), signature, parent in zip(prepared, signatures, spans):
+            with within(parent):
+                digests.append(self.submit_signed_transaction(tx_bytes, signature) if signature else None)
+        return digests
+    
+    @traced("signing")
+    def _sign_batch(self, prepared: List[Tuple[str, bytes]]) -> List[Optional[str]]:
+        return self.signer.sign_many(prepared)
+    
     def copy_transfer_transaction(
         self,
         original_tx: Dict,
@@ -0,0 +1,130 @@
+"""
+Sui Transaction Builder
+BCS-encodes simple SUI transfers locally so they can be signed without the CLI
+"""
+
+import base64
+import hashlib
+from typing import List, Tuple
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# (object_id, version, digest) as returned by suix_getCoins
+ObjectRef = Tuple[str, int, str]
+
+
+def b58decode(value: str) -> bytes:
+    number = 0
+    for char in value:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big") if number else b""
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading_zeros + body
+
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading_zeros + encoded
+
+
+def uleb128(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def u16(value: int) -> bytes:
+    return value.to_bytes(2, "little")
+
+
+def u64(value: int) -> bytes:
+    return value.to_bytes(8, "little")
+
+
+def address(value: str) -> bytes:
+    """32-byte Sui address / object ID from 0x-prefixed hex (short forms are left-padded)"""
+    hex_part = value[2:] if value.startswith("0x") else value
+    return bytes.fromhex(hex_part.rjust(64, "0"))
+
+
+def byte_vector(data: bytes) -> bytes:
+    return uleb128(len(data)) + data
+
+
+def object_ref(ref: ObjectRef) -> bytes:
+    object_id, version, digest = ref
+    return address(object_id) + u64(int(version)) + byte_vector(b58decode(digest))
+
+
+# Argument variants
+def arg_gas_coin() -> bytes:
+    return b"\x00"
+
+
+def arg_input(index: int) -> bytes:
+    return b"\x01" + u16(index)
+
+
+def arg_nested_result(command: int, index: int) -> bytes:
+    return b"\x03" + u16(command) + u16(index)
+
+
+def build_sui_transfer(
+    sender: str,
+    recipient: str,
+    amount: int,
+    gas_payment: List[ObjectRef],
+    gas_price: int,
+    gas_budget: int,
+) -> bytes:
+    """
+    TransactionData::V1 for a programmable transaction that splits amount
+    off the gas coin and transfers it to recipient (what paySui builds).
+    """
+    inputs = [
+        b"\x00" + byte_vector(u64(amount)),           # CallArg::Pure(u64)
+        b"\x00" + byte_vector(address(recipient)),    # CallArg::Pure(address)
+    ]
+    commands = [
+        # Command::SplitCoins(GasCoin, [Input(0)])
+        b"\x02" + arg_gas_coin() + uleb128(1) + arg_input(0),
+        # Command::TransferObjects([NestedResult(0, 0)], Input(1))
+        b"\x01" + uleb128(1) + arg_nested_result(0, 0) + arg_input(1),
+    ]
+    programmable = (
+        uleb128(len(inputs)) + b"".join(inputs)
+        + uleb128(len(commands)) + b"".join(commands)
+    )
+    gas_data = (
+        uleb128(len(gas_payment)) + b"".join(object_ref(ref) for ref in gas_payment)
+        + address(sender)
+        + u64(gas_price)
+        + u64(gas_budget)
+    )
+    return (
+        b"\x00"                 # TransactionData::V1
+        + b"\x00" + programmable  # TransactionKind::ProgrammableTransaction
+        + address(sender)
+        + gas_data
+        + b"\x00"               # TransactionExpiration::None
+    )
+
+
+def transaction_digest(tx_bytes: bytes) -> str:
+    """The digest the chain will assign, known before submission"""
+    return b58encode(hashlib.blake2b(b"TransactionData::" + tx_bytes, digest_size=32).digest())
+
+
+def to_base64(tx_bytes: bytes) -> str:
+    return base64.b64encode(tx_bytes).decode()
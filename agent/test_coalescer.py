@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script to verify copy coalescing and netting
+Queues hand-sized copies in a CopyCoalescer with a fake clock - no network needed
+"""
+
+import sys
+
+from coalescer import CopyCoalescer, canonical_asset
+
+FOLLOWER = "0x" + "f0" * 32
+TRADER_A = "0x" + "a1" * 32
+TRADER_B = "0x" + "b2" * 32
+
+
+def batch_for(coalescer: CopyCoalescer, now: float):
+    batches = coalescer.due(now=now)
+    return batches[0] if len(batches) == 1 else None
+
+
+def main():
+    print("\n" + "="*60)
+    print("🧪 TESTING COPY COALESCING")
+    print("="*60 + "\n")
+
+    failures = 0
+
+    # Test 1: both directions of a pair share one netting key
+    print("Test 1: Mapping swap directions to a netting key...")
+    print("-" * 60)
+    keys = [canonical_asset("SUI/USDC"), canonical_asset("USDC/SUI"), canonical_asset("SUI")]
+    if keys == [("SUI/USDC", 1), ("SUI/USDC", -1), ("SUI", 1)]:
+        print("✅ SUI/USDC and USDC/SUI net against each other, transfers stay positive")
+    else:
+        print(f"❌ Unexpected keys: {keys}")
+        failures += 1
+
+    # Test 2: same-direction copies add up
+    print("\nTest 2: Summing same-direction copies...")
+    print("-" * 60)
+    coalescer = CopyCoalescer(default_window=5)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI/USDC", 1_000, trade=None, price=2.0, now=0)
+    coalescer.add(FOLLOWER, TRADER_B, "SUI/USDC", 500, trade=None, price=2.1, now=1)
+    batch = batch_for(coalescer, now=5)
+    if batch and batch.asset == "SUI/USDC" and batch.copy_amount == 1_500 and batch.traders == [TRADER_A, TRADER_B]:
+        print(f"✅ One {batch.asset} copy of {batch.copy_amount} from both traders")
+    else:
+        print(f"❌ Unexpected batch: {batch and (batch.asset, batch.copy_amount, batch.traders)}")
+        failures += 1
+
+    # Test 3: an opposite-direction copy is converted at its price and netted
+    print("\nTest 3: Netting an opposite-direction copy at its price...")
+    print("-" * 60)
+    coalescer = CopyCoalescer(default_window=5)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI/USDC", 1_000, trade=None, price=2.0, now=0)
+    # 400 USDC sold for SUI at 0.5 SUI per USDC offsets 200 SUI
+    coalescer.add(FOLLOWER, TRADER_B, "USDC/SUI", 400, trade=None, price=0.5, now=1)
+    batch = batch_for(coalescer, now=5)
+    if batch and batch.asset == "SUI/USDC" and batch.copy_amount == 800 and len(batch.entries) == 2:
+        print(f"✅ Netted to {batch.copy_amount} SUI in the original direction")
+    else:
+        print(f"❌ Unexpected batch: {batch and (batch.asset, batch.copy_amount)}")
+        failures += 1
+
+    # Test 4: when the reverse leg dominates, the net copy flips and is sized in its outgoing asset
+    print("\nTest 4: Flipping direction when the reverse leg is larger...")
+    print("-" * 60)
+    coalescer = CopyCoalescer(default_window=5)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI/USDC", 100, trade=None, price=2.0, now=0)
+    # 1000 USDC at 0.5 is 500 SUI; net -400 SUI = 800 USDC to sell
+    coalescer.add(FOLLOWER, TRADER_B, "USDC/SUI", 1_000, trade=None, price=0.5, now=1)
+    batch = batch_for(coalescer, now=5)
+    if batch and batch.asset == "USDC/SUI" and batch.copy_amount == 800:
+        print(f"✅ Net copy is {batch.asset} {batch.copy_amount}")
+    else:
+        print(f"❌ Unexpected batch: {batch and (batch.asset, batch.copy_amount)}")
+        failures += 1
+
+    # Test 5: exactly offsetting copies net out to nothing
+    print("\nTest 5: Netting offsetting copies to zero...")
+    print("-" * 60)
+    coalescer = CopyCoalescer(default_window=5)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI/USDC", 500, trade=None, price=2.0, now=0)
+    coalescer.add(FOLLOWER, TRADER_B, "USDC/SUI", 1_000, trade=None, price=0.5, now=1)
+    batch = batch_for(coalescer, now=5)
+    if batch and batch.copy_amount == 0:
+        print("✅ Nothing left to execute")
+    else:
+        print(f"❌ Unexpected batch: {batch and (batch.asset, batch.copy_amount)}")
+        failures += 1
+
+    # Test 6: batches wait out their window; pending amounts count before netting
+    print("\nTest 6: Holding batches for their window...")
+    print("-" * 60)
+    coalescer = CopyCoalescer(default_window=5)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI/USDC", 1_000, trade=None, price=2.0, now=0)
+    coalescer.add(FOLLOWER, TRADER_B, "USDC/SUI", 400, trade=None, price=0.5, now=1)
+    coalescer.add(FOLLOWER, TRADER_A, "SUI", 300, trade=None, now=2)
+    early = coalescer.due(now=4)
+    pending = coalescer.pending_amount(FOLLOWER)
+    ready = coalescer.due(now=7)
+    if not early and pending == 1_700 and len(ready) == 2 and coalescer.pending_count() == 0:
+        print(f"✅ Held until the window closed, {pending} pending before netting")
+    else:
+        print(f"❌ early={len(early)} pending={pending} ready={len(ready)}")
+        failures += 1
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} test(s) failed")
+        sys.exit(1)
+    print("✅ Copy coalescing working correctly!")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script to verify vectorized copy sizing
+Sizes one trade for a row of followers built to hit each check - no network needed
+"""
+
+import sys
+
+from copy_sizing import (
+    GAS_RESERVE,
+    MIN_COPY_AMOUNT,
+    STATUS_DISABLED,
+    STATUS_DUST,
+    STATUS_ERRORS,
+    STATUS_EXPOSURE_LIMIT,
+    STATUS_INSUFFICIENT_BALANCE,
+    STATUS_OK,
+    size_copies,
+)
+
+SUI = 1_000_000_000
+NO_CAP = 2**64 - 1  # on-chain "no max trade size"
+
+
+def main():
+    print("\n" + "="*60)
+    print("🧪 TESTING COPY SIZING")
+    print("="*60 + "\n")
+
+    failures = 0
+
+    # Test 1: percentage and max trade size
+    print("Test 1: Applying copy percentage and max trade size...")
+    print("-" * 60)
+    sizing = size_copies(
+        10 * SUI,
+        copy_percentage=[10, 50, 100],
+        max_trade_size=[NO_CAP, 2 * SUI, NO_CAP],
+        balance=[100 * SUI] * 3,
+    )
+    amounts = [int(a) for a in sizing.copy_amounts]
+    if amounts == [SUI, 2 * SUI, 10 * SUI] and list(sizing.status) == [STATUS_OK] * 3:
+        print(f"✅ Sized {amounts} (u64 'no cap' clipped without overflow)")
+    else:
+        print(f"❌ Unexpected sizes {amounts}, status {list(sizing.status)}")
+        failures += 1
+
+    # Test 2: each check fails on its own
+    print("\nTest 2: Flagging dust, exposure, balance and disabled followers...")
+    print("-" * 60)
+    sizing = size_copies(
+        10 * SUI,
+        copy_percentage=[10, 0, 10, 10, 10, 10],
+        max_trade_size=[NO_CAP] * 6,
+        balance=[100 * SUI, 100 * SUI, 100 * SUI, 100 * SUI, SUI + GAS_RESERVE - 1, 100 * SUI],
+        auto_copy_enabled=[True, True, True, True, True, False],
+        exposure_used=[0, 0, 50 * SUI, 50 * SUI - SUI // 2, 0, 0],
+        exposure_limit=[50 * SUI] * 6,
+    )
+    expected = [STATUS_OK, STATUS_DUST, STATUS_EXPOSURE_LIMIT, STATUS_OK, STATUS_INSUFFICIENT_BALANCE, STATUS_DISABLED]
+    if list(sizing.status) == expected and int(sizing.copy_amounts[3]) == SUI // 2:
+        print("✅ One status per failing check; partial headroom trims the copy instead")
+    else:
+        print(f"❌ Expected {expected}, got {list(sizing.status)} ({[int(a) for a in sizing.copy_amounts]})")
+        failures += 1
+
+    # Test 3: the first failing check wins when several fail
+    print("\nTest 3: Resolving followers that fail several checks...")
+    print("-" * 60)
+    sizing = size_copies(
+        10 * SUI,
+        copy_percentage=[0, 10, 10, 0],
+        max_trade_size=[NO_CAP] * 4,
+        balance=[0] * 4,
+        auto_copy_enabled=[True, True, True, False],
+        exposure_used=[0, 50 * SUI, 50 * SUI - MIN_COPY_AMOUNT // 2, 50 * SUI],
+        exposure_limit=[50 * SUI] * 4,
+    )
+    # dust beats balance; exposure beats dust and balance; disabled beats everything
+    expected = [STATUS_DUST, STATUS_EXPOSURE_LIMIT, STATUS_EXPOSURE_LIMIT, STATUS_DISABLED]
+    if list(sizing.status) == expected:
+        print("✅ Dust before balance, exposure before dust, disabled before all")
+    else:
+        print(f"❌ Expected {expected}, got {list(sizing.status)}")
+        failures += 1
+
+    # Test 4: statuses map to the errors reported per follower
+    print("\nTest 4: Reporting errors per follower...")
+    print("-" * 60)
+    errors = [sizing.error_for(index) for index in range(4)]
+    ok = size_copies(10 * SUI, [10], [NO_CAP], [100 * SUI]).error_for(0)
+    if ok is None and errors == [STATUS_ERRORS[s] for s in expected]:
+        print(f"✅ {errors}")
+    else:
+        print(f"❌ Unexpected errors {errors} / {ok}")
+        failures += 1
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} test(s) failed")
+        sys.exit(1)
+    print("✅ Copy sizing working correctly!")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
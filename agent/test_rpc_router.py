@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script to verify RPC routing, hedging and checkpoint ejection
+Spins up local stand-in fullnodes with injected latency - no network needed
+"""
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rate_limiter import TokenBucketLimiter
+from rpc_router import RpcRouter
+
+
+class StandInNode:
+    """Minimal JSON-RPC server that answers after a configurable delay"""
+
+    def __init__(self, name: str, latency: float, checkpoint: int = 1000):
+        self.name = name
+        self.latency = latency
+        self.checkpoint = checkpoint
+        self.hits = 0
+        self.throttle = 0  # answer this many requests with HTTP 429 first
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                node.hits += 1
+                time.sleep(node.latency)
+                if node.throttle:
+                    node.throttle -= 1
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if body["method"] == "sui_getLatestCheckpointSequenceNumber":
+                    result = str(node.checkpoint)
+                else:
+                    result = {"node": node.name}
+                data = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def read_payload():
+    return {"jsonrpc": "2.0", "id": 1, "method": "sui_getObject", "params": ["0x1"]}
+
+
+def main():
+    print("\n" + "="*60)
+    print("🧪 TESTING RPC ROUTER")
+    print("="*60 + "\n")
+
+    failures = 0
+
+    # Test 1: reads settle on the fastest node
+    print("Test 1: Routing to the fastest endpoint...")
+    print("-" * 60)
+    fast = StandInNode("fast", 0.01)
+    slow = StandInNode("slow", 0.3)
+    router = RpcRouter([slow.url, fast.url], health_interval=3600)
+    for _ in range(20):
+        router.call(read_payload())
+    answer = router.call(read_payload())["result"]["node"]
+    if answer == "fast" and router.primary_url == fast.url:
+        print(f"✅ Primary is the fast node ({answer})")
+    else:
+        print(f"❌ Expected fast node, got {answer}")
+        failures += 1
+
+    # Test 2: a node that turns slow gets hedged
+    print("\nTest 2: Hedging a primary that turns slow...")
+    print("-" * 60)
+    fast.latency = 1.0
+    slow.latency = 0.02
+    start = time.monotonic()
+    answer = router.call(read_payload())["result"]["node"]
+    elapsed = time.monotonic() - start
+    if answer == "slow" and elapsed < 0.5:
+        print(f"✅ Hedged request answered by backup in {elapsed*1000:.0f}ms")
+    else:
+        print(f"❌ Hedge did not win: {answer} after {elapsed*1000:.0f}ms")
+        failures += 1
+    fast.stop()
+    slow.stop()
+
+    # Test 3: dead endpoints fail over
+    print("\nTest 3: Failing over from a dead endpoint...")
+    print("-" * 60)
+    alive = StandInNode("alive", 0.01)
+    router = RpcRouter(["http://127.0.0.1:9", alive.url], timeout=2, health_interval=3600)
+    answer = router.call(read_payload())["result"]["node"]
+    if answer == "alive":
+        print("✅ Request served by the live endpoint")
+    else:
+        print(f"❌ Unexpected answer: {answer}")
+        failures += 1
+    alive.stop()
+
+    # Test 4: lagging nodes are ejected
+    print("\nTest 4: Ejecting an endpoint behind on checkpoints...")
+    print("-" * 60)
+    tip = StandInNode("tip", 0.05, checkpoint=5000)
+    behind = StandInNode("behind", 0.0, checkpoint=4000)
+    router = RpcRouter([behind.url, tip.url], max_checkpoint_lag=20, health_interval=3600)
+    router.check_health()
+    answer = router.call(read_payload())["result"]["node"]
+    if answer == "tip" and router.endpoints[0].ejected:
+        print("✅ Lagging endpoint ejected, reads go to the tip")
+    else:
+        print(f"❌ Unexpected routing: {answer} / {router.stats()}")
+        failures += 1
+    tip.stop()
+    behind.stop()
+
+    # Test 5: a 429 is waited out and retried, not surfaced to the caller
+    print("\nTest 5: Retrying after HTTP 429...")
+    print("-" * 60)
+    only = StandInNode("only", 0.0)
+    only.throttle = 1
+    router = RpcRouter([only.url], health_interval=3600, limiter=TokenBucketLimiter(rate=50))
+    start = time.monotonic()
+    try:
+        answer = router.call(read_payload())["result"]["node"]
+    except Exception as e:
+        answer = f"error: {e}"
+    elapsed = time.monotonic() - start
+    if answer == "only" and only.hits == 2 and elapsed >= 0.9:
+        print(f"✅ Retried after the Retry-After pause ({elapsed*1000:.0f}ms)")
+    else:
+        print(f"❌ Unexpected result: {answer} after {only.hits} hit(s), {elapsed*1000:.0f}ms")
+        failures += 1
+    only.stop()
+
+    # Test 6: concurrent reads neither queue behind each other nor get hedged
+    print("\nTest 6: Serving concurrent reads without spurious hedges...")
+    print("-" * 60)
+    first = StandInNode("first", 0.2)
+    second = StandInNode("second", 0.2)
+    router = RpcRouter([first.url, second.url], health_interval=3600, min_hedge_delay=0.3)
+    for _ in range(3):
+        router.call(read_payload())  # latency samples for the hedge delay
+    first.hits = second.hits = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=16) as callers:
+        answers = list(callers.map(lambda _: router.call(read_payload())["result"]["node"], range(16)))
+    elapsed = time.monotonic() - start
+    sent = first.hits + second.hits
+    if len(answers) == 16 and sent == 16 and elapsed < 0.5:
+        print(f"✅ 16 concurrent reads in {elapsed*1000:.0f}ms with {sent} requests sent")
+    else:
+        print(f"❌ 16 concurrent reads took {elapsed*1000:.0f}ms and sent {sent} requests")
+        failures += 1
+    first.stop()
+    second.stop()
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} test(s) failed")
+        sys.exit(1)
+    print("✅ RPC router working correctly!")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
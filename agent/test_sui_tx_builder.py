@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script to verify local transaction building and signing byte-for-byte
+Expected values were produced with the pysui SDK (pysui.sui.sui_bcs.bcs,
+SuiKeyPair.new_sign_secure) for the same key and transfer - no network needed
+"""
+
+import base64
+import sys
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from keystore_signer import address_from_public_key, sign_transaction
+from sui_tx_builder import build_sui_transfer, transaction_digest
+
+# Fixed Ed25519 seed 0x00..0x1f
+SEED = bytes(range(32))
+PUBLIC_KEY = "03a107bff3ce10be1d70dd18e74bc09967e4d6309ba50d5f1ddc8664125531b8"
+
+RECIPIENT = "0x" + "ab" * 32
+GAS_COIN = ("0x" + "cd" * 32, 1234, "4vJ9JU1bJJE96FWSJKvHsmmFADCg4gpZQff4P3bkLKi")
+AMOUNT = 1_000_000
+GAS_PRICE = 750
+GAS_BUDGET = 10_000_000
+
+# Sui SDK vectors
+SDK_ADDRESS = "0x160179a1565ea7cff27ead23f54cc7f50893bf58155cd7285156e57afa31c3ac"
+SDK_TX_BYTES = (
+    "AAACAAhAQg8AAAAAAAAgq6urq6urq6urq6urq6urq6urq6urq6urq6urq6urq6sCAgABAQAAAQEDAAAAAAEBABYBeaFW"
+    "XqfP8n6tI/VMx/UIk79YFVzXKFFW5Xr6McOsAc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3N0gQAAAAAAAAg"
+    "AQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEWAXmhVl6nz/J+rSP1TMf1CJO/WBVc1yhRVuV6+jHDrO4CAAAA"
+    "AAAAgJaYAAAAAAAA"
+)
+SDK_DIGEST = "DFJtZ1KmvW4Fk7z7K2AapcarNdD6cUTHELMhww3doQZc"
+SDK_SIGNATURE = (
+    "AC1zx2whHDpUdZtxZsQ208uV/X488Qt2YY28Tq+fVe69vSiUcBC4K294W1JGtHVaBI7QZ03lNjK4ZuqiM2ATKgQDoQe/"
+    "884Qvh1w3RjnS8CZZ+TWMJulDV8d3IZkElUxuA=="
+)
+
+
+def main():
+    print("\n" + "="*60)
+    print("🧪 TESTING LOCAL TRANSACTION BUILDING AND SIGNING")
+    print("="*60 + "\n")
+
+    failures = 0
+
+    # Test 1: address derivation (blake2b of flag || public key)
+    print("Test 1: Deriving the address from the public key...")
+    print("-" * 60)
+    public_key = Ed25519PrivateKey.from_private_bytes(SEED).public_key().public_bytes_raw()
+    address = address_from_public_key(public_key)
+    if public_key.hex() == PUBLIC_KEY and address == SDK_ADDRESS:
+        print(f"✅ Address matches the SDK ({address[:16]}...)")
+    else:
+        print(f"❌ Expected {SDK_ADDRESS}, got {address}")
+        failures += 1
+
+    # Test 2: BCS TransactionData for a split-and-transfer
+    print("\nTest 2: BCS-encoding a SUI transfer...")
+    print("-" * 60)
+    tx_bytes = build_sui_transfer(
+        sender=SDK_ADDRESS,
+        recipient=RECIPIENT,
+        amount=AMOUNT,
+        gas_payment=[GAS_COIN],
+        gas_price=GAS_PRICE,
+        gas_budget=GAS_BUDGET,
+    )
+    expected_bytes = base64.b64decode(SDK_TX_BYTES)
+    if tx_bytes == expected_bytes:
+        print(f"✅ Transaction bytes match the SDK ({len(tx_bytes)} bytes)")
+    else:
+        first_diff = next(
+            (i for i, (a, b) in enumerate(zip(tx_bytes, expected_bytes)) if a != b),
+            min(len(tx_bytes), len(expected_bytes)),
+        )
+        print(f"❌ Transaction bytes differ from the SDK at byte {first_diff}")
+        failures += 1
+
+    # Test 3: digest the chain will assign
+    print("\nTest 3: Computing the transaction digest...")
+    print("-" * 60)
+    digest = transaction_digest(expected_bytes)
+    if digest == SDK_DIGEST:
+        print(f"✅ Digest matches the SDK ({digest})")
+    else:
+        print(f"❌ Expected {SDK_DIGEST}, got {digest}")
+        failures += 1
+
+    # Test 4: Ed25519 signature over the TransactionData intent message
+    print("\nTest 4: Signing the intent message...")
+    print("-" * 60)
+    signature = sign_transaction(SEED, expected_bytes)
+    if signature == SDK_SIGNATURE:
+        print("✅ Serialized signature matches the SDK")
+    else:
+        print(f"❌ Expected {SDK_SIGNATURE}, got {signature}")
+        failures += 1
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} test(s) failed")
+        sys.exit(1)
+    print("✅ Local building and signing match the Sui SDK!")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
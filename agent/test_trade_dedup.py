@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script to verify trade detection watermarks
+Feeds hand-built transaction pages through DetectionWatermarks on a temporary
+SQLite file - no network needed
+"""
+
+import os
+import sys
+import tempfile
+
+from rpc_profiles import TxSummary
+from trade_dedup import DetectionWatermarks
+
+TRADER = "0x" + "aa" * 32
+
+
+def tx(digest: str, checkpoint, timestamp_ms: int = 0) -> TxSummary:
+    return TxSummary(digest, timestamp_ms, TRADER, (), checkpoint=checkpoint)
+
+
+def digests(txs) -> list:
+    return [t.digest for t in txs]
+
+
+def main():
+    print("\n" + "="*60)
+    print("🧪 TESTING TRADE DETECTION WATERMARKS")
+    print("="*60 + "\n")
+
+    failures = 0
+    db_path = os.path.join(tempfile.mkdtemp(), "watermarks.db")
+    watermarks = DetectionWatermarks(db_path)
+
+    # Test 1: a new trader starts at the tip without copying history
+    print("Test 1: Initializing a trader at the newest checkpoint...")
+    print("-" * 60)
+    history = [tx("h1", 10, 1000), tx("h2", 10, 1001), tx("h0", 9, 900)]
+    skipped = watermarks.initialize(TRADER, history)
+    replayed = watermarks.claim_new(TRADER, history)
+    if skipped == 3 and watermarks.knows(TRADER) and not replayed:
+        print("✅ Existing transactions skipped, nothing replayed")
+    else:
+        print(f"❌ Skipped {skipped}, replayed {digests(replayed)}")
+        failures += 1
+
+    # Test 2: duplicates and out-of-order results are claimed once, oldest first
+    print("\nTest 2: Claiming a page with duplicates in random order...")
+    print("-" * 60)
+    page = [tx("b", 12, 1201), tx("h2", 10, 1001), tx("a", 11, 1100), tx("b", 12, 1201), tx("c", 12, 1200)]
+    claimed = watermarks.claim_new(TRADER, page)
+    again = watermarks.claim_new(TRADER, list(reversed(page)))
+    if digests(claimed) == ["a", "c", "b"] and not again:
+        print(f"✅ Claimed {digests(claimed)} once, repeat page claimed nothing")
+    else:
+        print(f"❌ Claimed {digests(claimed)}, then {digests(again)}")
+        failures += 1
+
+    # Test 3: one checkpoint split across two overlapping pages
+    print("\nTest 3: Claiming a checkpoint that spans two pages...")
+    print("-" * 60)
+    first = watermarks.claim_new(TRADER, [tx("d", 13, 1300), tx("e", 13, 1301)])
+    second = watermarks.claim_new(TRADER, [tx("e", 13, 1301), tx("f", 13, 1302), tx("g", 14, 1400)])
+    if digests(first) == ["d", "e"] and digests(second) == ["f", "g"]:
+        print("✅ Late transaction in the same checkpoint claimed, overlap skipped")
+    else:
+        print(f"❌ First page {digests(first)}, second page {digests(second)}")
+        failures += 1
+
+    # Test 4: transactions not yet in a checkpoint wait for a later scan
+    print("\nTest 4: Leaving uncheckpointed transactions for later...")
+    print("-" * 60)
+    pending = watermarks.claim_new(TRADER, [tx("p", None, 1500)])
+    landed = watermarks.claim_new(TRADER, [tx("p", 15, 1500)])
+    if not pending and digests(landed) == ["p"]:
+        print("✅ Claimed only once it landed in a checkpoint")
+    else:
+        print(f"❌ Pending claimed {digests(pending)}, landed claimed {digests(landed)}")
+        failures += 1
+
+    # Test 5: a descending page stops paging once it reaches covered checkpoints
+    print("\nTest 5: Detecting when a scan reaches the watermark...")
+    print("-" * 60)
+    newer_only = watermarks.covers(TRADER, [tx("q", 17), tx("r", 16)])
+    reaches_back = watermarks.covers(TRADER, [tx("q", 17), tx("g", 14)])
+    unknown = watermarks.covers("0x" + "bb" * 32, [tx("z", 1)])
+    if not newer_only and reaches_back and unknown:
+        print("✅ Only pages reaching below the watermark (or unknown traders) are covered")
+    else:
+        print(f"❌ newer={newer_only} reaches_back={reaches_back} unknown={unknown}")
+        failures += 1
+
+    # Test 6: watermarks survive a restart
+    print("\nTest 6: Reopening the database after a restart...")
+    print("-" * 60)
+    watermarks.close()
+    reopened = DetectionWatermarks(db_path)
+    replay = reopened.claim_new(TRADER, [tx("f", 13, 1302), tx("p", 15, 1500), tx("h", 15, 1501)])
+    if reopened.knows(TRADER) and digests(replay) == ["h"]:
+        print("✅ Claimed digests persisted, only the new transaction claimed")
+    else:
+        print(f"❌ After reopening claimed {digests(replay)}")
+        failures += 1
+    reopened.close()
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} test(s) failed")
+        sys.exit(1)
+    print("✅ Trade detection watermarks working correctly!")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
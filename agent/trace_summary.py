@@ -0,0 +1,111 @@
+"""
+Trace Summary
+Per-stage latency percentiles from the spans the agent exports (TRACE_FILE)
+
+Usage: python trace_summary.py [trace_file] [--since MINUTES] [--digest TX_DIGEST]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List
+
+# Pipeline order; any other span names are listed after these
+STAGES = [
+    "polling",
+    "query_sui_transactions",
+    "get_follower_settings",
+    "get_balance",
+    "get_gas_coins",
+    "get_reference_gas_price",
+    "dry_run",
+    "signing",
+    "submission",
+    "copy",
+    "trade",
+]
+
+
+def read_spans(path: str) -> Iterator[Dict]:
+    """Spans from an OTLP/JSON lines file, one export request per line"""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    yield from scope_spans.get("spans", [])
+
+
+def span_attribute(span: Dict, key: str) -> str:
+    for attribute in span.get("attributes", []):
+        if attribute["key"] == key:
+            return next(iter(attribute["value"].values()))
+    return ""
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(spans: Iterator[Dict], since_ns: int = 0, digest: str = "") -> Dict[str, Dict]:
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for span in spans:
+        start_ns = int(span["startTimeUnixNano"])
+        if start_ns < since_ns:
+            continue
+        if digest and span_attribute(span, "trade.tx_digest") != digest:
+            continue
+        name = span["name"]
+        durations.setdefault(name, []).append((int(span["endTimeUnixNano"]) - start_ns) / 1e6)
+        if span.get("status", {}).get("code") == 2:
+            errors[name] = errors.get(name, 0) + 1
+
+    summary = {}
+    ordered = [name for name in STAGES if name in durations] + sorted(set(durations) - set(STAGES))
+    for name in ordered:
+        values = sorted(durations[name])
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from copy-trading traces")
+    parser.add_argument("trace_file", nargs="?", default=os.getenv("TRACE_FILE", "traces.jsonl"))
+    parser.add_argument("--since", type=float, default=0, help="only spans from the last N minutes")
+    parser.add_argument("--digest", default="", help="only spans of one trader transaction")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trace_file):
+        print(f"❌ Trace file not found: {args.trace_file}")
+        sys.exit(1)
+
+    since_ns = time.time_ns() - int(args.since * 60 * 1e9) if args.since else 0
+    summary = summarize(read_spans(args.trace_file), since_ns=since_ns, digest=args.digest)
+    if not summary:
+        print("No spans found")
+        return
+
+    print(f"{'stage':<26}{'count':>8}{'errors':>8}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+    for name, row in summary.items():
+        print(
+            f"{name:<26}{row['count']:>8}{row['errors']:>8}"
+            f"{row['p50']:>11.1f}{row['p95']:>11.1f}{row['p99']:>11.1f}{row['max']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
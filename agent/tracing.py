@@ -0,0 +1,276 @@
+"""
+Trade Tracing
+Per-stage spans for every detected trade and its follower copies, exported as
+OpenTelemetry OTLP/JSON to a local file (one export request per line) and/or
+an OTLP/HTTP collector. Every span of a trade shares a trace ID derived from
+the trader's transaction digest, which is also attached as trade.tx_digest.
+"""
+
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+
+SPAN_KIND_INTERNAL = 1
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "correlation_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        correlation_id: str,
+        start_ns: int,
+        attributes: Dict,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.correlation_id = correlation_id
+        self.start_ns = start_ns
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> Dict:
+        attributes = dict(self.attributes)
+        attributes["trade.tx_digest"] = self.correlation_id
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def trace_id_for(correlation_id: str) -> str:
+    """Deterministic 128-bit trace ID, so any component can find a trade's trace from its digest"""
+    return hashlib.blake2b(correlation_id.encode(), digest_size=16).hexdigest()
+
+
+class SpanExporter:
+    """Buffers finished spans and writes them from a background thread, off the hot path"""
+
+    def __init__(self, path: Optional[str], endpoint: Optional[str], service_name: str, flush_interval: float = 1.0):
+        self.path = path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(flush_interval,), name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+
+    def _run(self, flush_interval: float):
+        while not self._stop.wait(flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "copy-trading-agent.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        if self.path:
+            try:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(request) + "\n")
+            except OSError as e:
+                print(f"⚠️ Could not write spans to {self.path}: {e}")
+        if self.endpoint:
+            try:
+                requests.post(self.endpoint, json=request, timeout=5)
+            except Exception as e:
+                print(f"⚠️ Could not export spans to {self.endpoint}: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+_exporter: Optional[SpanExporter] = None
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def configure(path: Optional[str] = None, endpoint: Optional[str] = None, service_name: str = "copy-trading-agent"):
+    """Turn tracing on. With neither a file nor a collector endpoint, tracing stays off."""
+    global _exporter
+    if path or endpoint:
+        _exporter = SpanExporter(path, endpoint, service_name)
+
+
+def shutdown():
+    global _exporter
+    if _exporter:
+        _exporter.close()
+        _exporter = None
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+@contextmanager
+def trace(name: str, correlation_id: str, start_ns: Optional[int] = None, **attributes) -> Iterator[Optional[Span]]:
+    """Root span of a trade; spans opened inside it (in this context) become its children"""
+    root = start_trace(name, correlation_id, start_ns, **attributes)
+    if root is None:
+        yield None
+        return
+    with _activate(root):
+        yield root
+
+
+def start_trace(name: str, correlation_id: str, start_ns: Optional[int] = None, **attributes) -> Optional[Span]:
+    """Root span that stays open until end_span, like start_span; None with tracing off"""
+    if _exporter is None:
+        return None
+    return Span(name, trace_id_for(correlation_id), None, correlation_id, start_ns or time.time_ns(), attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Child span of the current trace; a no-op outside a trace or with tracing off"""
+    parent = _current.get()
+    if _exporter is None or parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, parent.correlation_id, time.time_ns(), attributes)
+    with _activate(child):
+        yield child
+
+
+def start_span(name: str, **attributes) -> Optional[Span]:
+    """
+    Child span of the current trace that is not made current and stays open
+    until end_span, for work that is interleaved with other spans (e.g. one
+    follower's copy across batched stages). None outside a trace or with tracing off.
+    """
+    parent = _current.get()
+    if _exporter is None or parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, parent.correlation_id, time.time_ns(), attributes)
+
+
+def end_span(open_span: Optional[Span], error: Optional[str] = None, **attributes):
+    if open_span is None or open_span.end_ns:
+        return
+    open_span.attributes.update(attributes)
+    open_span.error = error
+    open_span.end_ns = time.time_ns()
+    if _exporter:
+        _exporter.export(open_span)
+
+
+@contextmanager
+def within(parent: Optional[Span]) -> Iterator[Optional[Span]]:
+    """Make an open span current for the enclosed (synchronous) code; no-op for None"""
+    if parent is None:
+        yield None
+        return
+    token = _current.set(parent)
+    try:
+        yield parent
+    finally:
+        _current.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Decorator: run the function inside a span named after its pipeline stage"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None or _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func: Callable, parent: Optional[Span] = None) -> Callable:
+    """
+    func bound to a copy of the current context, so spans it opens on a pool
+    thread join the caller's trace (under parent instead of the current span
+    when given). Bind once per job: a context can only be entered by one
+    thread at a time.
+    """
+    context = contextvars.copy_context()
+    if parent is not None:
+        context.run(_current.set, parent)
+    return functools.partial(context.run, func)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes):
+    """
+    Child span (of parent, or of the current span) for a stage that was timed
+    before the trace existed or was shared by a batch
+    """
+    parent = parent or _current.get()
+    if _exporter is None or parent is None:
+        return
+    finished = Span(name, parent.trace_id, parent.span_id, parent.correlation_id, start_ns, attributes)
+    finished.end_ns = end_ns
+    _exporter.export(finished)
+
+
+@contextmanager
+def _activate(active: Span):
+    token = _current.set(active)
+    try:
+        yield active
+    except Exception as e:
+        active.error = str(e)
+        raise
+    finally:
+        _current.reset(token)
+        active.end_ns = time.time_ns()
+        if _exporter:
+            _exporter.export(active)
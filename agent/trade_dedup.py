@@ -0,0 +1,135 @@
+"""
+Trade Detection Watermarks
+Per-trader checkpoint watermark plus the digests already claimed in that
+checkpoint, persisted to SQLite, so every trader transaction is copied at
+most once regardless of page size, result order, overlapping scans or restarts
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+
+from rpc_profiles import TxSummary
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trade_watermarks (
+    trader TEXT PRIMARY KEY,
+    checkpoint INTEGER NOT NULL,
+    digests TEXT NOT NULL
+);
+"""
+
+
+class TraderWatermark:
+    """
+    Everything in a checkpoint below `checkpoint` has been handled; in
+    `checkpoint` itself only `digests` have. Size is bounded by how many
+    transactions one trader lands in a single checkpoint.
+    """
+
+    __slots__ = ("checkpoint", "digests")
+
+    def __init__(self, checkpoint: int, digests: Set[str]):
+        self.checkpoint = checkpoint
+        self.digests = digests
+
+    def seen(self, tx: TxSummary) -> bool:
+        if tx.checkpoint < self.checkpoint:
+            return True
+        return tx.checkpoint == self.checkpoint and tx.digest in self.digests
+
+    def advance(self, tx: TxSummary):
+        if tx.checkpoint > self.checkpoint:
+            self.checkpoint = tx.checkpoint
+            self.digests = {tx.digest}
+        elif tx.checkpoint == self.checkpoint:
+            self.digests.add(tx.digest)
+
+
+class DetectionWatermarks:
+    def __init__(self, db_path: str, max_cached_traders: int = 4096):
+        # Watermarks live in SQLite; only the most recently used traders are kept in memory
+        self.max_cached_traders = max_cached_traders
+        self._cache: "OrderedDict[str, Optional[TraderWatermark]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _get(self, trader: str) -> Optional[TraderWatermark]:
+        """Watermark for trader (None if never seen); caller holds the lock"""
+        if trader in self._cache:
+            self._cache.move_to_end(trader)
+            return self._cache[trader]
+
+        row = self._conn.execute(
+            "SELECT checkpoint, digests FROM trade_watermarks WHERE trader = ?", (trader,)
+        ).fetchone()
+        watermark = TraderWatermark(row[0], set(json.loads(row[1]))) if row else None
+        self._cache[trader] = watermark
+        if len(self._cache) > self.max_cached_traders:
+            self._cache.popitem(last=False)
+        return watermark
+
+    def _store(self, trader: str, watermark: TraderWatermark):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO trade_watermarks (trader, checkpoint, digests) VALUES (?, ?, ?)",
+                (trader, watermark.checkpoint, json.dumps(sorted(watermark.digests))),
+            )
+
+    def knows(self, trader: str) -> bool:
+        with self._lock:
+            return self._get(trader) is not None
+
+    def covers(self, trader: str, txs: Iterable[TxSummary]) -> bool:
+        """True once a descending page reaches transactions the watermark already covers"""
+        with self._lock:
+            watermark = self._get(trader)
+            return watermark is None or any(
+                tx.checkpoint is not None and tx.checkpoint < watermark.checkpoint for tx in txs
+            )
+
+    def initialize(self, trader: str, txs: List[TxSummary]) -> int:
+        """
+        Start tracking a trader at the newest checkpoint in txs without copying
+        anything already on chain. Returns how many transactions were skipped.
+        """
+        checkpointed = [tx for tx in txs if tx.checkpoint is not None]
+        if not checkpointed:
+            return 0
+        newest = max(tx.checkpoint for tx in checkpointed)
+        watermark = TraderWatermark(newest, {tx.digest for tx in checkpointed if tx.checkpoint == newest})
+        with self._lock:
+            self._cache[trader] = watermark
+            self._store(trader, watermark)
+        return len(checkpointed)
+
+    def claim_new(self, trader: str, txs: Iterable[TxSummary]) -> List[TxSummary]:
+        """
+        The transactions in txs this trader has not had claimed yet, oldest
+        first, and claim them (persisted before returning). Claiming before
+        copying means a crash mid-copy skips a trade instead of copying it twice.
+        Transactions not yet in a checkpoint are left for a later scan.
+        """
+        ordered = sorted(
+            {tx.digest: tx for tx in txs if tx.checkpoint is not None}.values(),
+            key=lambda tx: (tx.checkpoint, tx.timestamp_ms),
+        )
+        with self._lock:
+            watermark = self._get(trader)
+            if watermark is None:
+                return []
+            claimed = [tx for tx in ordered if not watermark.seen(tx)]
+            if claimed:
+                for tx in claimed:
+                    watermark.advance(tx)
+                self._store(trader, watermark)
+            return claimed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
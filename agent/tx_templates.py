@@ -0,0 +1,235 @@
+"""
+Transaction Templates
+Keeps a ready-to-fill transfer skeleton per follower (gas coin, gas price,
+budget, balance and copy settings) so the copy hot path only fills in the
+amount, signs and submits
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from contract_queries import ContractQuerier
+from preflight import budget_from_effects
+from sui_executor import SuiTransactionExecutor
+from sui_tx_builder import ObjectRef, build_sui_transfer
+
+
+class TransferTemplate:
+    __slots__ = (
+        "sender", "gas_coin", "coin_balance", "balance", "gas_price",
+        "gas_budget", "refreshed_at", "in_flight", "stale",
+    )
+
+    def __init__(
+        self,
+        sender: str,
+        gas_coin: ObjectRef,
+        coin_balance: int,
+        balance: int,
+        gas_price: int,
+        gas_budget: int,
+    ):
+        self.sender = sender
+        self.gas_coin = gas_coin
+        self.coin_balance = coin_balance
+        self.balance = balance
+        self.gas_price = gas_price
+        self.gas_budget = gas_budget
+        self.refreshed_at = time.monotonic()
+        self.in_flight = 0  # amount of the submitted-but-unsettled transfer, 0 when idle
+        self.stale = False
+
+    def covers(self, amount: int) -> bool:
+        return self.coin_balance >= amount + self.gas_budget
+
+    def fill(self, recipient: str, amount: int) -> bytes:
+        return build_sui_transfer(
+            sender=self.sender,
+            recipient=recipient,
+            amount=amount,
+            gas_payment=[self.gas_coin],
+            gas_price=self.gas_price,
+            gas_budget=self.gas_budget,
+        )
+
+
+class TemplateCache:
+    def __init__(
+        self,
+        executor: SuiTransactionExecutor,
+        querier: ContractQuerier,
+        max_age: float = 30.0,
+        default_gas_budget: int = 10000000,
+        gas_margin_pct: int = 20,
+    ):
+        self.executor = executor
+        self.querier = querier
+        self.max_age = max_age
+        self.default_gas_budget = default_gas_budget
+        self.gas_margin_pct = gas_margin_pct
+
+        self._templates: Dict[str, TransferTemplate] = {}
+        self._settings: Dict[Tuple[str, str], Tuple[Optional[Dict], float]] = {}  # (follower, trader) -> (settings, fetched_at)
+        self._lock = threading.Lock()
+
+        # Submission responses carry the gas coin's new version, so templates
+        # roll forward without a refetch
+        executor.effects_listeners.append(self.apply_effects)
+
+    def watch(self, pairs: Iterable[Tuple[str, str]]):
+        """
+        Keep templates and settings for exactly these (follower, trader) pairs;
+        pairs that were unfollowed, and templates of followers left with no pair,
+        are dropped
+        """
+        wanted = set(pairs)
+        with self._lock:
+            for pair in list(self._settings):
+                if pair not in wanted:
+                    del self._settings[pair]
+            for pair in wanted:
+                self._settings.setdefault(pair, (None, 0.0))
+            followers = {follower for follower, _ in wanted}
+            for follower in list(self._templates):
+                if follower not in followers:
+                    del self._templates[follower]
+
+    def settings_for(self, follower: str, trader: str) -> Optional[Dict]:
+        """
+        Cached copy settings if fetched within max_age, otherwise fetched on the
+        spot. Query errors propagate and are not cached.
+        """
+        with self._lock:
+            cached = self._settings.get((follower, trader))
+        if cached and cached[1] and time.monotonic() - cached[1] <= self.max_age:
+            return cached[0]
+        settings = self.querier.get_follower_settings(follower, trader)
+        with self._lock:
+            self._settings[(follower, trader)] = (settings, time.monotonic())
+        return settings
+
+    def get(self, follower: str) -> Optional[TransferTemplate]:
+        """The follower's template if it can be used right now"""
+        with self._lock:
+            template = self._templates.get(follower)
+            if template is None or template.stale or template.in_flight:
+                return None
+            if time.monotonic() - template.refreshed_at > self.max_age:
+                return None
+            return template
+
+    def fill(self, follower: str, recipient: str, amount: int) -> Optional[bytes]:
+        """
+        TransactionData for a copy built from the follower's template, or None if
+        there is no usable template. The template is locked until the effects of
+        this transaction come back (or mark_stale), since they change the gas
+        coin's version.
+        """
+        with self._lock:
+            template = self._templates.get(follower)
+            if template is None or template.stale or template.in_flight:
+                return None
+            if time.monotonic() - template.refreshed_at > self.max_age or not template.covers(amount):
+                return None
+            template.in_flight = amount
+        return template.fill(recipient, amount)
+
+    def mark_stale(self, follower: str):
+        with self._lock:
+            template = self._templates.get(follower)
+            if template:
+                template.stale = True
+                template.in_flight = 0
+
+    def apply_effects(self, effects: Dict):
+        """Roll a template forward from the effects of a transaction it paid gas for"""
+        gas_object = effects.get("gasObject", {})
+        sender = gas_object.get("owner", {}).get("AddressOwner")
+        reference = gas_object.get("reference", {})
+        with self._lock:
+            template = self._templates.get(sender)
+            if template is None or reference.get("objectId") != template.gas_coin[0]:
+                return
+
+            gas = effects.get("gasUsed", {})
+            gas_charged = (
+                int(gas.get("computationCost", 0))
+                + int(gas.get("storageCost", 0))
+                - int(gas.get("storageRebate", 0))
+            )
+            succeeded = effects.get("status", {}).get("status") == "success"
+            spent = gas_charged + (template.in_flight if succeeded else 0)
+
+            template.gas_coin = (reference["objectId"], int(reference["version"]), reference["digest"])
+            template.coin_balance -= spent
+            template.balance -= spent
+            template.gas_budget = budget_from_effects(effects, self.gas_margin_pct)
+            template.in_flight = 0
+
+    def refresh(self, follower: str) -> Optional[TransferTemplate]:
+        """Rebuild a follower's template from chain state (coins + reference gas price)"""
+        coins = self.executor.get_gas_coins(follower)
+        if not coins:
+            with self._lock:
+                self._templates.pop(follower, None)
+            return None
+
+        largest = self.executor.select_coin_objects(coins, 0)[0]
+        with self._lock:
+            previous = self._templates.get(follower)
+        template = TransferTemplate(
+            sender=follower,
+            gas_coin=(largest["coinObjectId"], int(largest["version"]), largest["digest"]),
+            coin_balance=int(largest["balance"]),
+            balance=sum(int(coin.get("balance", 0)) for coin in coins),
+            gas_price=self.executor.get_reference_gas_price(),
+            gas_budget=previous.gas_budget if previous else self.default_gas_budget,
+        )
+        with self._lock:
+            current = self._templates.get(follower)
+            if current and current.in_flight:
+                return current  # a copy is using the old coin version; let its effects land first
+            self._templates[follower] = template
+        return template
+
+    def refresh_stale(self) -> int:
+        """
+        Background pass: refetch settings and templates that are stale or past
+        half of max_age, so settings_for keeps hitting the cache between passes.
+        Only followers we can sign for get a template.
+        Returns how many entries were refreshed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            settings_due = [pair for pair, (_, fetched_at) in self._settings.items() if now - fetched_at > self.max_age / 2]
+            followers = {follower for follower, _ in self._settings}
+            templates_due = [
+                follower for follower in followers
+                if self.executor.can_sign(follower) and self._needs_refresh(follower, now)
+            ]
+
+        refreshed = 0
+        for follower, trader in settings_due:
+            try:
+                settings = self.querier.get_follower_settings(follower, trader)
+            except Exception as e:
+                print(f"⚠️ Could not refresh settings for {follower[:8]}...: {e}")
+                continue
+            with self._lock:
+                self._settings[(follower, trader)] = (settings, time.monotonic())
+            refreshed += 1
+
+        for follower in templates_due:
+            try:
+                self.refresh(follower)
+                refreshed += 1
+            except Exception as e:
+                print(f"⚠️ Could not refresh transaction template for {follower[:8]}...: {e}")
+        return refreshed
+
+    def _needs_refresh(self, follower: str, now: float) -> bool:
+        template = self._templates.get(follower)
+        if template is None or template.stale:
+            return True
+        return not template.in_flight and now - template.refreshed_at > self.max_age / 2
@@ -0,0 +1,137 @@
+"""
+Username Resolution
+Address -> username index built incrementally from usernameRegistry UsernameSet events
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from rate_limiter import PRIORITY_BACKGROUND
+from rpc_router import RpcRouter
+
+# suix_queryEvents page size (the fullnode maximum)
+EVENT_PAGE_SIZE = 50
+
+
+class UsernameResolver:
+    def __init__(self, router: RpcRouter, package_id: str, negative_ttl: float = 300.0):
+        self.router = router
+        self.package_id = package_id
+        # How long an address with no username is trusted to still have none
+        self.negative_ttl = negative_ttl
+
+        self._names: Dict[str, str] = {}
+        self._misses: Dict[str, float] = {}  # address -> when we last found no username
+        self._cursor: Optional[Dict] = None  # last suix_queryEvents cursor we consumed
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def sync(self) -> int:
+        """
+        Read UsernameSet events published since the last sync (all of them on
+        the first call). Returns how many events were applied.
+        """
+        if not self.package_id:
+            return 0
+
+        with self._sync_lock:
+            applied = 0
+            while True:
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "suix_queryEvents",
+                    "params": [
+                        {
+                            "MoveEventType": f"{self.package_id}::usernameregistry::UsernameSet"
+                        },
+                        self._cursor,
+                        EVENT_PAGE_SIZE,
+                        False  # ascending, so later renames win
+                    ]
+                }
+
+                try:
+                    result = self.router.call(payload, priority=PRIORITY_BACKGROUND)
+                except Exception as e:
+                    print(f"❌ Error syncing usernames: {e}")
+                    return applied
+                if "result" not in result:
+                    print(f"⚠️ Username sync rejected: {result.get('error')}")
+                    return applied
+
+                page = result["result"]
+                with self._lock:
+                    for event in page.get("data", []):
+                        parsed = event.get("parsedJson", {})
+                        user = parsed.get("user")
+                        username = parsed.get("username")
+                        if user and username:
+                            self._names[user] = username
+                            self._misses.pop(user, None)
+                            applied += 1
+
+                if page.get("nextCursor"):
+                    self._cursor = page["nextCursor"]
+                if not page.get("hasNextPage"):
+                    return applied
+
+    def lookup(self, address: str) -> Optional[str]:
+        """Username from memory only; never touches the network"""
+        with self._lock:
+            return self._names.get(address)
+
+    def resolve_many(self, addresses: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Usernames for a batch of addresses. Addresses we know nothing about
+        trigger at most one incremental sync for the whole batch; addresses that
+        still have no username afterwards are negatively cached for negative_ttl.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        now = time.monotonic()
+        with self._lock:
+            unknown = [
+                address for address in addresses
+                if address not in self._names and now - self._misses.get(address, -self.negative_ttl) >= self.negative_ttl
+            ]
+
+        if unknown:
+            self.sync()
+            with self._lock:
+                for address in unknown:
+                    if address not in self._names:
+                        self._misses[address] = now
+
+        with self._lock:
+            return {address: self._names.get(address) for address in addresses}
+
+    def display(self, address: str, length: int = 16) -> str:
+        """Username for logs, falling back to the truncated hex address"""
+        username = self.lookup(address)
+        if username:
+            return f"@{username} ({address[:10]}...)"
+        return f"{address[:length]}..."
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._names)
+
+
+# Test the resolver
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    rpc_url = os.getenv("SUI_RPC_URL", "https://fullnode.testnet.sui.io:443")
+    package_id = os.getenv(
+        "USERNAME_REGISTRY_PACKAGE_ID",
+        "0xf280398432bee996bb8ddf1fc62a6c1dfa43204884c4270a1eb2ac4687513f0f"
+    )
+
+    resolver = UsernameResolver(RpcRouter([rpc_url]), package_id)
+    print(f"📇 Synced {resolver.sync()} UsernameSet event(s), {resolver.size()} username(s)")
+    for address, username in list(resolver._names.items())[:10]:
+        print(f"   {address[:16]}... -> @{username}")